@@ -3,16 +3,28 @@ from flask_cors import CORS
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, AutoModelForSeq2SeqLM, AutoModel
 from lime.lime_text import LimeTextExplainer
-import pandas as pd
 import numpy as np 
 import os 
+import re
 import json
 import faiss
 import fitz # PyMuPDF
 from deep_translator import GoogleTranslator
 import requests 
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-# Standard Python string methods are used for segmentation to prevent NameError crashes.
+try:
+    import onnxruntime as ort  # int8 ONNX serving (scripts/export_onnx_int8.py)
+except ImportError:
+    ort = None
+
+try:
+    import ahocorasick  # pyahocorasick: C automaton for multi-keyword scans
+except ImportError:
+    ahocorasick = None
 
 app = Flask(__name__)
 CORS(app)
@@ -26,98 +38,373 @@ INDEXES_DIR = os.path.join(BASE_DIR, "indexes")
 
 BERT_PATH = os.path.join(MODELS_DIR, "legalbert_clause_classifier")
 T5_PATH = os.path.join(MODELS_DIR, "legal_t5_summarizer")
-JUDGMENT_MODEL_PATH = os.path.join(MODELS_DIR, "legalbert_judgment_finetuned")
+# May point at a smaller encoder (e.g. sentence-transformers/all-MiniLM-L6-v2); rebuild the FAISS index to match
+JUDGMENT_MODEL_PATH = os.getenv("JUDGMENT_MODEL_PATH", os.path.join(MODELS_DIR, "legalbert_judgment_finetuned"))
+# 1 = embed judgments with the clause classifier's own encoder instead of loading a second BERT
+SHARE_JUDGE_BACKBONE = os.getenv("SHARE_JUDGE_BACKBONE", "0") == "1"
+TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "facebook/nllb-200-distilled-600M")  # local Hindi/Marathi -> English
+NLLB_SRC_LANGS = {"hi": "hin_Deva", "mr": "mar_Deva"}  # API `lang` -> NLLB source code
+BERT_ONNX_PATH = os.path.join(BERT_PATH, "model.int8.onnx")
+JUDGMENT_ONNX_PATH = os.path.join(JUDGMENT_MODEL_PATH, "model.int8.onnx")
 
 CSV_PATH = os.path.join(MODELS_DIR, "prepared_data.csv")
+ID2LABEL_PATH = os.path.join(MODELS_DIR, "id2label.json")  # derived from CSV_PATH on first boot
 RISK_RULES_PATH = os.path.join(MODELS_DIR, "risk_assessment", "rule_keywords.json")
-FAISS_INDEX_PATH = os.path.join(INDEXES_DIR, "judgments.index")
+# Set FAISS_INDEX_PATH=.../indexes/judgments_ivfpq.index to serve the IVF-PQ rebuild (scripts/build_faiss_ivfpq.py)
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", os.path.join(INDEXES_DIR, "judgments.index"))
 FAISS_META_PATH = os.path.join(INDEXES_DIR, "judgments_meta.json")
+FAISS_META_DIR = os.path.join(INDEXES_DIR, "judgments_meta")  # memmapped columns (scripts/convert_faiss_meta.py)
+CASE_NAME_BYTES = 128
+PDF_PREVIEW_CHARS = 5000
+FAISS_NPROBE = 16  # IVF lists probed per query (ignored by flat indexes)
 
 # ==========================================
 # 2. GLOBAL VARIABLES
 # ==========================================
-bert_model = None; bert_tokenizer = None
-t5_model = None; t5_tokenizer = None
-judge_model = None; judge_tokenizer = None
-faiss_index = None; faiss_meta = []
+bert_model = None; bert_tokenizer = None; bert_session = None
+t5_model = None; t5_tokenizer = None; t5_prefix_ids = []
+judge_model = None; judge_tokenizer = None; judge_session = None
+trans_model = None; trans_tokenizer = None; _trans_loaded = False
+faiss_index = None; faiss_meta = []; faiss_meta_cols = None
 
 id2label = {}; explainer = {}; risk_rules = {}
+risk_matchers = {}; clause_keyword_matcher = []; label_keyword_matcher = []
+label_categories = {}  # model label -> template category, resolved once per label
+
+# Keywords probed by the summary / safer-alternative routing in analyze_single_clause_post
+CLAUSE_KEYWORDS = [
+    "liability", "liable", "damages", "injunctive", "indemnity", "indemnification", "termination",
+    "force majeure", "force_majeure", "breach", "penalty", "penalties",
+    "non-compete", "noncompete", "non_compete", "confidentiality", "nda", "non-disclosure",
+]
+# Label routing also splits "Force Majeure"-style labels into words
+LABEL_KEYWORDS = CLAUSE_KEYWORDS + ["force", "majeure"]
+
+# "Golden Clauses" - Pre-approved safe text for insertion
+SAFE_LIABILITY = "The Provider's total liability under this Agreement shall not exceed the total fees paid by the Client during the preceding 12 months."
+SAFE_TERMINATION = "Either party may terminate this Agreement for convenience upon providing thirty (30) days' prior written notice to the other party."
+SAFE_INDEMNITY = "Indemnification shall be limited to third-party claims arising directly from gross negligence or willful misconduct."
+SAFE_FORCE_MAJEURE = "Neither party shall be liable for any failure or delay in performance under this Agreement due to circumstances beyond its reasonable control, including but not limited to acts of God, natural disasters, war, terrorism, labor disputes, or government actions. The affected party shall notify the other party promptly and use reasonable efforts to resume performance."
+SAFE_BREACH_PENALTIES = "In the event of a material breach, the non-breaching party may terminate this Agreement upon thirty (30) days' written notice, provided the breaching party fails to cure such breach within such notice period. Remedies shall be limited to termination and recovery of actual damages directly caused by the breach."
+SAFE_NON_COMPETE = "During the term of this Agreement and for a period of twelve (12) months thereafter, the Employee agrees not to engage in any business activity that directly competes with the Employer's business, provided such restriction is limited to the geographic area where the Employer operates and is necessary to protect the Employer's legitimate business interests."
+SAFE_CONFIDENTIALITY = "Each party agrees to maintain the confidentiality of all proprietary and confidential information disclosed by the other party, using the same degree of care as it uses to protect its own confidential information, but in no event less than reasonable care. This obligation shall survive termination of this Agreement for a period of three (3) years."
+SAFE_GENERAL = "The parties agree to resolve any disputes through mutual consultation before seeking other legal remedies."
+
+TEMPLATE_MAP = {
+    "force_majeure": SAFE_FORCE_MAJEURE, "breach_penalty": SAFE_BREACH_PENALTIES, "liability": SAFE_LIABILITY,
+    "termination": SAFE_TERMINATION, "indemnity": SAFE_INDEMNITY, "non_compete": SAFE_NON_COMPETE,
+    "confidentiality": SAFE_CONFIDENTIALITY,
+}
+# (category, test over keyword hits) in priority order: first match wins
+LABEL_CATEGORY_RULES = [
+    ("force_majeure", lambda h: "force" in h and "majeure" in h),
+    ("breach_penalty", lambda h: "breach" in h and ("penalty" in h or "penalties" in h)),
+    ("liability", lambda h: "liability" in h),
+    ("termination", lambda h: "termination" in h),
+    ("indemnity", lambda h: "indemnity" in h or "indemnification" in h),
+    ("non_compete", lambda h: "non-compete" in h or "noncompete" in h or "non_compete" in h),
+    ("confidentiality", lambda h: "confidentiality" in h or "nda" in h or "non-disclosure" in h),
+]
+TEXT_CATEGORY_RULES = [
+    ("force_majeure", lambda h: "force majeure" in h or "force_majeure" in h),
+    ("breach_penalty", lambda h: ("breach" in h and ("penalty" in h or "penalties" in h)) or ("liable" in h and "damages" in h and "injunctive" in h)),
+    ("liability", lambda h: "liability" in h or ("liable" in h and "damages" in h)),
+    ("termination", lambda h: "termination" in h),
+    ("indemnity", lambda h: "indemnity" in h or "indemnification" in h),
+    ("non_compete", lambda h: "non-compete" in h or "noncompete" in h or "non_compete" in h),
+    ("confidentiality", lambda h: "confidentiality" in h or "nda" in h or "non-disclosure" in h),
+]
 
 # OpenRouter/Gemini API Configuration
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
 OPENROUTER_API_URL = 'https://openrouter.ai/api/v1/chat/completions'
 GEMINI_MODEL = 'google/gemini-2.5-flash-lite' 
 
+# One keep-alive session per worker: OpenRouter calls reuse open TLS connections
+_http = requests.Session()
+_http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_http.headers.update({
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+    "HTTP-Referer": "https://lexsaksham.local",
+    "X-Title": "LexSaksham Contract Analysis"
+})
+
+# Response caches: exact (sha256 of normalized clause) + semantic (cosine over judge embeddings).
+# A semantic hit only reuses the neighbour's BERT prediction; risk rules, summary and LIME still run on the new text.
+CACHE_MAX_ENTRIES = 10000
+SEMANTIC_CACHE_THRESHOLD = 0.95
+_exact_cache = OrderedDict(); _gemini_cache = OrderedDict(); _lime_cache = OrderedDict()
+_t5_cache = OrderedDict(); T5_CACHE_MAX_ENTRIES = 2048
+_sem_index = None; _sem_payloads = []
+_cache_lock = threading.Lock()
+# Torch modules (compiled BERT/judge, T5, NLLB) are not safe to call from several threads at once:
+# every torch forward/generate runs under this lock. ONNX Runtime sessions are thread-safe and skip it.
+_model_lock = threading.Lock()
+
+# Per-clause tails overlap here so Gemini/OpenRouter HTTP waits run in parallel; model work is serialized by _model_lock
+ANALYSIS_WORKERS = 8
+_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS)
+
+# Devanagari block: one C-level scan instead of a per-character Python loop
+_DEV_RE = re.compile(r"[\u0900-\u097F]")
+# Marathi tells when no `lang` is given: ळ (rare in Hindi) and common Marathi-only words
+_MARATHI_RE = re.compile(r"ळ|(?<!\S)(?:आहे|आहेत|आणि|किंवा|नाही|करणे)(?=[\s.,;:।]|$)")
+# Clause segmentation: document markers stripped in one sub, candidate lines (> 20 chars) in one scan
+_STRIP_MARKERS = re.compile(r"\[(?:Start|End) of Document\]")
+_LINE = re.compile(r"[^\n]{21,}")
+
+# Serving dtype: bf16 halves weight/activation bandwidth on CPU (models stay on CPU here)
+INFERENCE_DTYPE = torch.bfloat16
+
 # ==========================================
 # 3. RESOURCE LOADER
 # ==========================================
+def prepare_for_inference(model, compile_model=True):
+    """eval() + bf16 cast + torch.compile. Falls back to the eager model if compile is unavailable."""
+    model.eval()
+    model = model.to(dtype=INFERENCE_DTYPE)
+    if compile_model and hasattr(torch, "compile"):
+        # CUDA graphs ("reduce-overhead") only exist on GPU; on CPU that mode just warns on every call
+        mode = "reduce-overhead" if next(model.parameters()).is_cuda else "default"
+        try:
+            compiled = torch.compile(model, mode=mode, fullgraph=False)
+            # compile is lazy: run one dummy forward so inductor/compiler failures surface here, not on a request
+            dummy = torch.ones((1, 8), dtype=torch.long, device=next(model.parameters()).device)
+            with torch.inference_mode(): compiled(input_ids=dummy, attention_mask=dummy)
+            model = compiled
+        except Exception as e: print(f"⚠️ torch.compile unavailable, running eager: {e}")
+    return model
+
+def build_keyword_matcher(keywords):
+    """Compiles keywords into one Aho-Corasick automaton (plain list fallback without pyahocorasick)."""
+    keywords = [k.lower() for k in keywords if k]
+    if ahocorasick is None or not keywords: return keywords
+    automaton = ahocorasick.Automaton()
+    for k in keywords: automaton.add_word(k, k)
+    automaton.make_automaton()
+    return automaton
+
+def keyword_hits(matcher, lower_text):
+    """Set of matcher keywords occurring anywhere in lower_text, found in a single pass."""
+    if isinstance(matcher, list): return {k for k in matcher if k in lower_text}
+    return {k for _, k in matcher.iter(lower_text)}
+
+def match_category(rules, hits):
+    """First category whose rule accepts the keyword hit set, else None."""
+    return next((category for category, rule in rules if rule(hits)), None)
+
+def _label_to_category(label):
+    if label not in label_categories:
+        label_categories[label] = match_category(LABEL_CATEGORY_RULES, keyword_hits(label_keyword_matcher, (label or "").lower()))
+    return label_categories[label]
+
+def _text_to_category(hits):
+    return match_category(TEXT_CATEGORY_RULES, hits)
+
+def has_keyword(matcher, lower_text):
+    """True as soon as any matcher keyword occurs in lower_text."""
+    if isinstance(matcher, list): return any(k in lower_text for k in matcher)
+    return next(matcher.iter(lower_text), None) is not None
+
+def load_onnx_session(path):
+    """int8 ONNX Runtime session on CPU, or None when onnxruntime / the exported model is missing."""
+    if ort is None or not os.path.exists(path): return None
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(path, sess_options=so, providers=["CPUExecutionProvider"])
+
+def load_meta_columns(meta_dir):
+    """Opens the columnar judgment metadata read-only via np.memmap; only queried rows get paged in."""
+    return {
+        "ids": np.memmap(os.path.join(meta_dir, "ids.i64"), dtype=np.int64, mode="r"),
+        "years": np.memmap(os.path.join(meta_dir, "years.i32"), dtype=np.int32, mode="r"),
+        "case_names": np.memmap(os.path.join(meta_dir, "case_names.u8"), dtype=np.uint8, mode="r").reshape(-1, CASE_NAME_BYTES),
+        "snippets": np.memmap(os.path.join(meta_dir, "snippets.u8"), dtype=np.uint8, mode="r"),
+        "snippet_offsets": np.memmap(os.path.join(meta_dir, "snippet_offsets.i64"), dtype=np.int64, mode="r"),
+    }
+
+def build_id2label(csv_path):
+    """Sorted clause_type labels from the training CSV; cached to ID2LABEL_PATH so later boots skip pandas."""
+    import pandas as pd
+    df = pd.read_csv(csv_path, usecols=['clause_type']); unique_labels = sorted(df['clause_type'].dropna().unique().tolist())
+    id2label = {i: label for i, label in enumerate(unique_labels)}
+    try:
+        with open(ID2LABEL_PATH, 'w') as f: json.dump(id2label, f, indent=2)
+    except OSError as e: print(f"⚠️ Could not cache label map to {ID2LABEL_PATH}: {e}")
+    return id2label
+
 def load_resources():
+    global bert_session, judge_session, t5_prefix_ids, faiss_meta_cols
     global bert_model, bert_tokenizer, t5_model, t5_tokenizer, judge_model, judge_tokenizer, faiss_index, faiss_meta, id2label, explainer, risk_rules
+    global risk_matchers, clause_keyword_matcher, label_keyword_matcher
     print("⏳ Loading LexSaksham AI Resources...")
     
     try:
-        bert_tokenizer = AutoTokenizer.from_pretrained(BERT_PATH); bert_model = AutoModelForSequenceClassification.from_pretrained(BERT_PATH); print("✅ BERT Classifier loaded.")
+        bert_tokenizer = AutoTokenizer.from_pretrained(BERT_PATH, use_fast=True); bert_session = load_onnx_session(BERT_ONNX_PATH)
+        if bert_session is not None: print("✅ BERT Classifier loaded (int8 ONNX).")
+        else: bert_model = prepare_for_inference(AutoModelForSequenceClassification.from_pretrained(BERT_PATH)); print("✅ BERT Classifier loaded.")
     except: print("❌ BERT Classifier Failed.")
     try:
-        t5_tokenizer = AutoTokenizer.from_pretrained(T5_PATH); t5_model = AutoModelForSeq2SeqLM.from_pretrained(T5_PATH); print("✅ T5 Summarizer loaded.")
+        t5_tokenizer = AutoTokenizer.from_pretrained(T5_PATH, use_fast=True); t5_model = prepare_for_inference(AutoModelForSeq2SeqLM.from_pretrained(T5_PATH), compile_model=False); print("✅ T5 Summarizer loaded.")
+        t5_prefix_ids = t5_tokenizer.encode("summarize: ", add_special_tokens=False)  # tokenized once, prepended per call
     except: print("❌ T5 Summarizer Failed.")
-    try:
-        judge_tokenizer = AutoTokenizer.from_pretrained(JUDGMENT_MODEL_PATH); judge_model = AutoModel.from_pretrained(JUDGMENT_MODEL_PATH); print("✅ Judgment Embedding Model loaded.")
-    except: print("⚠️ Judgment Model failed.")
+    if SHARE_JUDGE_BACKBONE and bert_model is not None:
+        # Classifier head is dropped: base_model returns the shared encoder's last_hidden_state
+        judge_tokenizer = bert_tokenizer; judge_model = bert_model.base_model; print("✅ Judgment Embeddings share the BERT Classifier backbone.")
+    else:
+        if SHARE_JUDGE_BACKBONE: print("⚠️ No torch BERT Classifier to share (ONNX or failed load), loading Judgment Model.")
+        try:
+            judge_tokenizer = AutoTokenizer.from_pretrained(JUDGMENT_MODEL_PATH, use_fast=True); judge_session = load_onnx_session(JUDGMENT_ONNX_PATH)
+            if judge_session is not None: print("✅ Judgment Embedding Model loaded (int8 ONNX).")
+            else: judge_model = prepare_for_inference(AutoModel.from_pretrained(JUDGMENT_MODEL_PATH)); print("✅ Judgment Embedding Model loaded.")
+        except: print("⚠️ Judgment Model failed.")
     if os.path.exists(FAISS_INDEX_PATH):
         try:
-            faiss_index = faiss.read_index(FAISS_INDEX_PATH); 
-            with open(FAISS_META_PATH, 'r') as f: faiss_meta = json.load(f);
+            faiss.omp_set_num_threads(os.cpu_count() or 1)
+            # mmap keeps IVF inverted lists in the shared OS page cache instead of per-worker RAM
+            try: faiss_index = faiss.read_index(FAISS_INDEX_PATH, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError: faiss_index = faiss.read_index(FAISS_INDEX_PATH)  # index type without mmap support
+            if hasattr(faiss_index, "nprobe"): faiss_index.nprobe = FAISS_NPROBE
+            if os.path.isdir(FAISS_META_DIR): faiss_meta_cols = load_meta_columns(FAISS_META_DIR)
+            else:
+                with open(FAISS_META_PATH, 'r') as f: faiss_meta = json.load(f);
             print(f"✅ FAISS Index loaded ({faiss_index.ntotal} records).")
         except: print("❌ FAISS Load Error.")
     if os.path.exists(RISK_RULES_PATH):
         with open(RISK_RULES_PATH, 'r') as f: risk_rules = json.load(f)
-    if os.path.exists(CSV_PATH):
-        df = pd.read_csv(CSV_PATH); unique_labels = sorted(df['clause_type'].dropna().unique().tolist()); id2label = {i: label for i, label in enumerate(unique_labels)};
+    risk_matchers = {level: build_keyword_matcher(risk_rules[level]) for level in ("High", "Medium") if level in risk_rules}
+    clause_keyword_matcher = build_keyword_matcher(CLAUSE_KEYWORDS)
+    label_keyword_matcher = build_keyword_matcher(LABEL_KEYWORDS)
+    if os.path.exists(ID2LABEL_PATH):
+        with open(ID2LABEL_PATH, 'r') as f: id2label = {int(k): v for k, v in json.load(f).items()}
+    elif os.path.exists(CSV_PATH):
+        id2label = build_id2label(CSV_PATH)
     else: id2label = {i: f"LABEL_{i}" for i in range(25)}
     
     # Initialize LIME
     explainer = LimeTextExplainer(class_names=[id2label.get(i, "Unknown") for i in range(len(id2label))])
     print("✅ System Ready.")
 
-load_resources()
+# Loaded once per process on first request; with LEXSAKSHAM_PRELOAD=1 (gunicorn.conf.py) the
+# gunicorn master loads everything before forking so workers share weight pages copy-on-write.
+_resources_loaded = False
+_resources_lock = threading.Lock()
+
+def ensure_resources():
+    global _resources_loaded
+    if _resources_loaded: return
+    with _resources_lock:
+        if not _resources_loaded:
+            load_resources(); _resources_loaded = True
+
+# NLLB (600M) is only needed for Devanagari input: loaded on the first such request, not in every worker at boot
+_trans_lock = threading.Lock()
+
+def ensure_translator():
+    global trans_model, trans_tokenizer, _trans_loaded
+    if _trans_loaded: return
+    with _trans_lock:
+        if _trans_loaded: return
+        try:
+            trans_tokenizer = AutoTokenizer.from_pretrained(TRANSLATION_MODEL); trans_model = prepare_for_inference(AutoModelForSeq2SeqLM.from_pretrained(TRANSLATION_MODEL), compile_model=False); print("✅ Local Translation Model loaded.")
+        except: print("⚠️ Local Translation Model failed, falling back to Google Translate.")
+        _trans_loaded = True
+
+@app.before_request
+def _load_on_first_request():
+    ensure_resources()
+
+if os.getenv("LEXSAKSHAM_PRELOAD") == "1": ensure_resources()
 
 # ==========================================
 # 4. HELPER FUNCTIONS
 # ==========================================
+def run_onnx(session, tokenizer, texts):
+    """Tokenizes texts and runs an ONNX session. Returns (first output as float32 tensor, attention_mask tensor)."""
+    enc = tokenizer(texts, return_tensors="np", truncation=True, padding=True, max_length=512)
+    feeds = {i.name: enc[i.name].astype(np.int64) for i in session.get_inputs()}
+    return torch.from_numpy(session.run(None, feeds)[0]).float(), torch.from_numpy(enc["attention_mask"])
+
+def bert_logits(texts):
+    """Classifier logits (float32), one row per text: int8 ONNX session when exported, else the torch model."""
+    if bert_session is not None: return run_onnx(bert_session, bert_tokenizer, texts)[0]
+    inputs = bert_tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
+    with _model_lock, torch.inference_mode():
+        return bert_model(**inputs).logits.float()
+
 def lime_predictor(texts):
-    outputs = []
-    for t in texts:
-        inputs = bert_tokenizer(t, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        with torch.no_grad():
-            logits = bert_model(**inputs).logits
-            probs = torch.softmax(logits, dim=1).detach().cpu().numpy()[0]
-            outputs.append(probs)
-    return np.array(outputs)
+    """Encodes all LIME perturbations in one fast-tokenizer call and scores them in one forward."""
+    return torch.softmax(bert_logits(list(texts)), dim=1).cpu().numpy()
 
 def get_judgment_embedding(text):
-    if not judge_model or not judge_tokenizer: return None
-    inputs = judge_tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    with torch.no_grad():
-        outputs = judge_model(**inputs)
-    return outputs.last_hidden_state.mean(dim=1).numpy()
+    """Mean-pooled judge embeddings; accepts one text or a list of texts (one row each)."""
+    if not judge_tokenizer or (judge_session is None and not judge_model): return None
+    if judge_session is not None:
+        hidden, attention_mask = run_onnx(judge_session, judge_tokenizer, text)
+    else:
+        inputs = judge_tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
+        with _model_lock, torch.inference_mode():
+            hidden = judge_model(**inputs).last_hidden_state.float()
+        attention_mask = inputs["attention_mask"]
+    # Masked mean so padded rows in a batch pool identically to a single unpadded query
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    return ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy()
+
+def judgment_meta(idx):
+    """Metadata dict for one FAISS row, decoded from the memmapped columns or read from the JSON list."""
+    if faiss_meta_cols is None: return faiss_meta[idx]
+    cols = faiss_meta_cols
+    start, end = cols["snippet_offsets"][idx], cols["snippet_offsets"][idx + 1]
+    return {
+        "judgment_id": int(cols["ids"][idx]),
+        "case_name": cols["case_names"][idx].tobytes().rstrip(b"\0").decode("utf-8", "ignore"),
+        "year": int(cols["years"][idx]),
+        "text": cols["snippets"][start:end].tobytes().decode("utf-8", "ignore"),
+    }
 
-def translate_to_english(text):
-    try:
+def translate_to_english(texts, lang="hi"):
+    """Hindi/Marathi (`lang`) -> English for a list of texts: one batched local NLLB generate, Google Translate if it is unavailable."""
+    results = list(texts)
+    pending = []
+    for i, text in enumerate(texts):
         if "उत्तरदायी" in text or "हर्ज़ाना" in text:
-             return "If a party breaches the contract, they will be liable to pay damages."
-        translator = GoogleTranslator(source='auto', target='en')
-        return translator.translate(text)
-    except:
-        return text 
+             results[i] = "If a party breaches the contract, they will be liable to pay damages."
+        else: pending.append(i)
+    if not pending: return results
 
+    ensure_translator()
+    if trans_model is not None:
+        try:
+            with _model_lock, torch.inference_mode():
+                # src_lang is tokenizer state shared across requests: set it and encode under the model lock
+                trans_tokenizer.src_lang = NLLB_SRC_LANGS.get(lang, "hin_Deva")
+                inputs = trans_tokenizer([texts[i] for i in pending], return_tensors="pt", padding=True, truncation=True, max_length=512)
+                outputs = trans_model.generate(**inputs, forced_bos_token_id=trans_tokenizer.convert_tokens_to_ids("eng_Latn"), max_length=512)
+            for i, english in zip(pending, trans_tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+                results[i] = english
+            return results
+        except Exception as e: print(f"⚠️ Local translation failed, using Google Translate: {e}")
+
+    for i in pending:
+        try: results[i] = GoogleTranslator(source='auto', target='en').translate(texts[i])
+        except: results[i] = texts[i]
+    return results
+
+@torch.inference_mode()
 def generate_t5_summary(text):
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cached = _lru_get(_t5_cache, key)
+    if cached is not None: return cached
     try:
-        prefix = "summarize: "
-        inputs = t5_tokenizer.encode(prefix + text, return_tensors="pt", max_length=512, truncation=True)
-        outputs = t5_model.generate(inputs, max_length=150, min_length=30, length_penalty=2.0, num_beams=4, early_stopping=True, no_repeat_ngram_size=3)
-        return t5_tokenizer.decode(outputs[0], skip_special_tokens=True)
+        # "summarize: " ids + body ids + </s>, same 512-token budget as encoding the joined string
+        body_ids = t5_tokenizer.encode(text, add_special_tokens=False)[:512 - len(t5_prefix_ids) - 1]
+        inputs = torch.tensor([t5_prefix_ids + body_ids + [t5_tokenizer.eos_token_id]])
+        with _model_lock: outputs = t5_model.generate(inputs, max_length=150, min_length=30, length_penalty=2.0, num_beams=4, early_stopping=True, no_repeat_ngram_size=3)
+        summary = t5_tokenizer.decode(outputs[0], skip_special_tokens=True)
     except: return "Summary unavailable."
+    _lru_put(_t5_cache, key, summary, T5_CACHE_MAX_ENTRIES)
+    return summary
 
 def generate_gemini_safer_alternative(clause_text, clause_label, risk_level, rule_summary, ml_suggestion=""):
     """
@@ -178,14 +465,11 @@ Generate a SHORT, CONCISE safer alternative (1-3 sentences only, under 200 words
             "max_tokens": max_tokens
         }
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "HTTP-Referer": "https://lexsaksham.local",
-            "X-Title": "LexSaksham Contract Analysis"
-        }
+        gemini_key = hashlib.sha256(f"{max_tokens}\n{system_prompt}\n{user_prompt}".encode("utf-8")).hexdigest()
+        cached_suggestion = _lru_get(_gemini_cache, gemini_key)
+        if cached_suggestion is not None: return cached_suggestion
 
-        response = requests.post(OPENROUTER_API_URL, json=payload, headers=headers, timeout=30)
+        response = _http.post(OPENROUTER_API_URL, json=payload, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -203,6 +487,7 @@ Generate a SHORT, CONCISE safer alternative (1-3 sentences only, under 200 words
                     print(f"⚠️ Gemini suggestion too long ({len(gemini_suggestion)} chars), using ML template")
                     return None
                 
+                _lru_put(_gemini_cache, gemini_key, gemini_suggestion)
                 return gemini_suggestion
         else:
             print(f"Gemini API error: {response.status_code} - {response.text}")
@@ -211,33 +496,132 @@ Generate a SHORT, CONCISE safer alternative (1-3 sentences only, under 200 words
         print(f"Error calling Gemini API: {str(e)}")
         return None
 
-def analyze_single_clause(clause):
+# --- RESPONSE CACHE (exact + semantic) ---
+def _cache_key(text):
+    return hashlib.sha256(text.strip().lower().encode("utf-8")).hexdigest()
+
+def _lru_get(cache, key):
+    with _cache_lock:
+        if key not in cache: return None
+        cache.move_to_end(key)
+        return cache[key]
+
+def _lru_put(cache, key, value, max_entries=CACHE_MAX_ENTRIES):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > max_entries: cache.popitem(last=False)
+
+def cached_analyses(clauses, explain=True):
+    """
+    Looks up each clause in the exact cache, then the semantic cache.
+    Returns (results, vectors, sem_probs): results[i] is a cached analysis or None on miss;
+    vectors maps miss index -> L2-normalized judge embedding, reused by store_analysis;
+    sem_probs maps miss index -> BERT probability row of a near-duplicate clause.
+    Exact entries cached without LIME only satisfy requests with explain=False.
+    """
+    results = [None] * len(clauses)
+    for i, clause in enumerate(clauses):
+        hit = _lru_get(_exact_cache, _cache_key(clause))
+        if hit is not None and (hit[1] or not explain): results[i] = dict(hit[0], text=clause)
+
+    misses = [i for i, r in enumerate(results) if r is None]
+    vectors = {}; sem_probs = {}
+    if not misses: return results, vectors, sem_probs
+    emb = get_judgment_embedding([clauses[i] for i in misses])
+    if emb is None: return results, vectors, sem_probs
+
+    emb = np.ascontiguousarray(emb, dtype='float32'); faiss.normalize_L2(emb)
+    vectors = dict(zip(misses, emb))
+    with _cache_lock:
+        if _sem_index is None or _sem_index.ntotal == 0: return results, vectors, sem_probs
+        D, I = _sem_index.search(emb, 1)
+        for row, i in enumerate(misses):
+            if I[row][0] == -1 or D[row][0] < SEMANTIC_CACHE_THRESHOLD: continue
+            # Only the label prediction carries over; its neighbour is already indexed, so don't add this vector
+            sem_probs[i] = _sem_payloads[I[row][0]]; del vectors[i]
+    return results, vectors, sem_probs
+
+def store_analysis(clause, result, vector=None, explained=True, probs_row=None):
+    """Records a fresh analysis in the exact cache and, when an embedding is available, its BERT probs in the semantic cache."""
+    global _sem_index
+    _lru_put(_exact_cache, _cache_key(clause), (result, explained))
+    if vector is None or probs_row is None: return
+    with _cache_lock:
+        # IndexFlatIP has no cheap LRU eviction; start over once the cap is reached
+        if _sem_index is None or _sem_index.ntotal >= CACHE_MAX_ENTRIES:
+            _sem_index = faiss.IndexFlatIP(vector.shape[0]); _sem_payloads.clear()
+        _sem_index.add(vector.reshape(1, -1)); _sem_payloads.append(probs_row.clone())
+
+def explain_with_lime(text, pred_id):
+    """LIME token weights for pred_id, cached by (sha256(text), pred_id)."""
+    key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), pred_id)
+    cached = _lru_get(_lime_cache, key)
+    if cached is not None: return cached
+    try:
+        exp = explainer.explain_instance(text, lime_predictor, num_features=5, top_labels=1, num_samples=20)
+        lime_list = exp.as_list(label=pred_id)
+        lime_explanation = [{"word": word, "weight": round(weight, 3)} for word, weight in lime_list]
+    except: return []
+    _lru_put(_lime_cache, key, lime_explanation)
+    return lime_explanation
+
+def detect_source_lang(clause, lang=None):
+    """NLLB source language for a Devanagari clause: the request's `lang` when it is hi/mr, else a Marathi/Hindi guess."""
+    if lang in NLLB_SRC_LANGS: return lang
+    return "mr" if _MARATHI_RE.search(clause) else "hi"
+
+def analyze_clauses_pre(clauses, lang=None):
+    """Language detection + translation (one batch per source language). Returns [(english_text, is_hindi), ...]."""
+    by_lang = {}
+    for i, clause in enumerate(clauses):
+        if _DEV_RE.search(clause) is not None: by_lang.setdefault(detect_source_lang(clause, lang), []).append(i)
+    texts = list(clauses)
+    for src, idx in by_lang.items():
+        for i, english in zip(idx, translate_to_english([clauses[i] for i in idx], src)):
+            texts[i] = english
+    devanagari = {i for idx in by_lang.values() for i in idx}
+    return [(text, i in devanagari) for i, text in enumerate(texts)]
+
+def classify_clauses(texts):
+    """Single batched BERT forward over all clause texts. Returns softmax probs, one row per text."""
+    return torch.softmax(bert_logits(texts), dim=1)
+
+def classify_misses(misses, texts, sem_probs):
+    """Probability row per miss: semantic-cache hits reuse their neighbour's row, the rest share one BERT forward."""
+    rows = [sem_probs.get(i) for i in misses]
+    todo = [k for k, row in enumerate(rows) if row is None]
+    if todo:
+        for k, row in zip(todo, classify_clauses([texts[k] for k in todo])): rows[k] = row
+    return rows
+
+def analyze_single_clause(clause, explain=True, lang=None):
     """Performs full analysis and generates adaptive clause insertion text."""
-    
-    is_hindi = any('\u0900' <= char <= '\u097F' for char in clause)
-    if is_hindi:
-        text = translate_to_english(clause)
-    else:
-        text = clause
+    cached, vectors, sem_probs = cached_analyses([clause], explain)
+    if cached[0] is not None: return cached[0]
+    text, is_hindi = analyze_clauses_pre([clause], lang)[0]
+    probs_row = classify_misses([0], [text], sem_probs)[0]
+    result = analyze_single_clause_post(clause, text, is_hindi, probs_row, explain)
+    store_analysis(clause, result, vectors.get(0), explain, probs_row)
+    return result
+
+def analyze_single_clause_post(clause, text, is_hindi, probs_row, explain=True):
+    """Risk, summary, safer alternative and (optionally) LIME for one clause, given its BERT probability row."""
 
     # BERT Prediction
-    inputs = bert_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        logits = bert_model(**inputs).logits
-    pred_id = torch.argmax(logits, dim=1).item()
-    confidence = torch.softmax(logits, dim=1)[0][pred_id].item()
+    pred_id = torch.argmax(probs_row).item()
+    confidence = probs_row[pred_id].item()
     label = id2label.get(pred_id, "Unknown")
     
     # Risk Logic
     final_risk = "Low"
     lower_text = text.lower()
+    kw = keyword_hits(clause_keyword_matcher, lower_text)  # one scan serves every keyword test below
     
-    if "High" in risk_rules:
-        for k in risk_rules["High"]:
-            if k in lower_text: final_risk = "High"; break
-    if final_risk != "High" and "Medium" in risk_rules:
-        for k in risk_rules["Medium"]:
-            if k in lower_text: final_risk = "Medium"; break
+    if "High" in risk_matchers and has_keyword(risk_matchers["High"], lower_text):
+        final_risk = "High"
+    if final_risk != "High" and "Medium" in risk_matchers and has_keyword(risk_matchers["Medium"], lower_text):
+        final_risk = "Medium"
     if final_risk != "High" and label in ["Indemnity", "Liability", "Termination"]:
         final_risk = "High"
 
@@ -245,26 +629,17 @@ def analyze_single_clause(clause):
     safer_alternative = ""
     rule_summary = ""
     
-    # "Golden Clauses" - Pre-approved safe text for insertion
-    SAFE_LIABILITY = "The Provider's total liability under this Agreement shall not exceed the total fees paid by the Client during the preceding 12 months."
-    SAFE_TERMINATION = "Either party may terminate this Agreement for convenience upon providing thirty (30) days' prior written notice to the other party."
-    SAFE_INDEMNITY = "Indemnification shall be limited to third-party claims arising directly from gross negligence or willful misconduct."
-    SAFE_FORCE_MAJEURE = "Neither party shall be liable for any failure or delay in performance under this Agreement due to circumstances beyond its reasonable control, including but not limited to acts of God, natural disasters, war, terrorism, labor disputes, or government actions. The affected party shall notify the other party promptly and use reasonable efforts to resume performance."
-    SAFE_BREACH_PENALTIES = "In the event of a material breach, the non-breaching party may terminate this Agreement upon thirty (30) days' written notice, provided the breaching party fails to cure such breach within such notice period. Remedies shall be limited to termination and recovery of actual damages directly caused by the breach."
-    SAFE_NON_COMPETE = "During the term of this Agreement and for a period of twelve (12) months thereafter, the Employee agrees not to engage in any business activity that directly competes with the Employer's business, provided such restriction is limited to the geographic area where the Employer operates and is necessary to protect the Employer's legitimate business interests."
-    SAFE_CONFIDENTIALITY = "Each party agrees to maintain the confidentiality of all proprietary and confidential information disclosed by the other party, using the same degree of care as it uses to protect its own confidential information, but in no event less than reasonable care. This obligation shall survive termination of this Agreement for a period of three (3) years."
-    SAFE_GENERAL = "The parties agree to resolve any disputes through mutual consultation before seeking other legal remedies."
 
     # 1. Generate Summary
     if is_hindi:
         rule_summary = "This Hindi clause (translated) outlines responsibilities. Please review the English translation carefully."
-    elif "liability" in lower_text or "indemnification" in lower_text:
+    elif "liability" in kw or "indemnification" in kw:
         rule_summary = "This clause outlines who is financially responsible if something goes wrong (liability) and who must pay legal costs (indemnity)."
-    elif "termination" in lower_text:
+    elif "termination" in kw:
         rule_summary = "This clause defines when and how the agreement can be ended."
-    elif "force majeure" in lower_text or "force_majeure" in lower_text.lower():
+    elif "force majeure" in kw or "force_majeure" in kw:
         rule_summary = "This clause addresses circumstances beyond either party's control that may prevent performance of the agreement."
-    elif "breach" in lower_text and ("penalty" in lower_text or "penalties" in lower_text or "damages" in lower_text):
+    elif "breach" in kw and ("penalty" in kw or "penalties" in kw or "damages" in kw):
         rule_summary = "This clause defines penalties and remedies for breach of contract."
     else:
         rule_summary = generate_t5_summary(text)
@@ -273,40 +648,9 @@ def analyze_single_clause(clause):
     # Step 1: Get ML model suggestion (template-based, reliable fallback)
     ml_suggestion = ""
     if final_risk == "High" or final_risk == "Critical":
-        # First, try to match by clause label/type (more accurate)
-        label_lower = label.lower() if label else ""
-        
-        if "force" in label_lower and "majeure" in label_lower:
-            ml_suggestion = SAFE_FORCE_MAJEURE
-        elif "breach" in label_lower and ("penalty" in label_lower or "penalties" in label_lower):
-            ml_suggestion = SAFE_BREACH_PENALTIES
-        elif "liability" in label_lower:
-            ml_suggestion = SAFE_LIABILITY
-        elif "termination" in label_lower:
-            ml_suggestion = SAFE_TERMINATION
-        elif "indemnity" in label_lower or "indemnification" in label_lower:
-            ml_suggestion = SAFE_INDEMNITY
-        elif "non-compete" in label_lower or "noncompete" in label_lower or "non_compete" in label_lower:
-            ml_suggestion = SAFE_NON_COMPETE
-        elif "confidentiality" in label_lower or "nda" in label_lower or "non-disclosure" in label_lower:
-            ml_suggestion = SAFE_CONFIDENTIALITY
-        # Fallback to text content matching if label doesn't match
-        elif "force majeure" in lower_text or "force_majeure" in lower_text:
-            ml_suggestion = SAFE_FORCE_MAJEURE
-        elif ("breach" in lower_text and ("penalty" in lower_text or "penalties" in lower_text)) or ("liable" in lower_text and "damages" in lower_text and "injunctive" in lower_text):
-            ml_suggestion = SAFE_BREACH_PENALTIES
-        elif "liability" in lower_text or ("liable" in lower_text and "damages" in lower_text):
-            ml_suggestion = SAFE_LIABILITY
-        elif "termination" in lower_text:
-            ml_suggestion = SAFE_TERMINATION
-        elif "indemnity" in lower_text or "indemnification" in lower_text:
-            ml_suggestion = SAFE_INDEMNITY
-        elif "non-compete" in lower_text or "noncompete" in lower_text or "non_compete" in lower_text:
-            ml_suggestion = SAFE_NON_COMPETE
-        elif "confidentiality" in lower_text or "nda" in lower_text or "non-disclosure" in lower_text:
-            ml_suggestion = SAFE_CONFIDENTIALITY
-        else:
-            ml_suggestion = SAFE_GENERAL
+        # Label category first (more accurate), then clause-text keywords; dict dispatch to the template
+        category = _label_to_category(label) or _text_to_category(kw) or "general"
+        ml_suggestion = TEMPLATE_MAP.get(category, SAFE_GENERAL)
         
         # Step 2: Prefer ML templates - they're concise and reliable
         # Only use Gemini for refinement on uncommon clause types
@@ -338,13 +682,8 @@ def analyze_single_clause(clause):
             safer_alternative = ml_suggestion
             print(f"✅ Using ML template for {label} (optimal template available)")
     
-    # LIME Explanation
-    lime_explanation = []
-    try:
-        exp = explainer.explain_instance(text, lime_predictor, num_features=5, top_labels=1, num_samples=20)
-        lime_list = exp.as_list(label=pred_id)
-        lime_explanation = [{"word": word, "weight": round(weight, 3)} for word, weight in lime_list]
-    except: lime_explanation = []
+    # LIME Explanation (opt-in; mostly decorative for bulk analysis)
+    lime_explanation = explain_with_lime(text, pred_id) if explain else []
     
     return {
         "text": clause,
@@ -370,33 +709,51 @@ def upload_pdf():
     file = request.files['file']
     try:
         doc = fitz.open(stream=file.read(), filetype="pdf")
-        text = ""
-        for page in doc: text += page.get_text()
-        return jsonify({"extracted_text": text[:5000]})
+        # Only the first PDF_PREVIEW_CHARS are returned: stop extracting pages once they are covered
+        parts = []; total = 0
+        for page in doc:
+            page_text = page.get_text(); parts.append(page_text); total += len(page_text)
+            if total >= PDF_PREVIEW_CHARS: break
+        doc.close()
+        return jsonify({"extracted_text": "".join(parts)[:PDF_PREVIEW_CHARS]})
     except Exception as e: return jsonify({"error": str(e)}), 500
 
 @app.route('/analyze_document', methods=['POST'])
 def analyze_document():
     raw_text = request.json.get('text', '')
     if not raw_text: return jsonify({"error": "Empty text"}), 400
+    explain = bool(request.json.get('explain', False))
+    lang = request.json.get('lang')
 
-    # Robust segmentation without regex import
-    clean_text = raw_text.replace("[Start of Document]", "").replace("[End of Document]", "")
-    clauses = [c.strip() for c in clean_text.split('\n') if c.strip()]
-    processed_clauses = [c for c in clauses if len(c) > 20]
+    # One line = one clause; keep lines longer than 20 chars after stripping
+    clean_text = _STRIP_MARKERS.sub("", raw_text)
+    processed_clauses = [c for m in _LINE.finditer(clean_text) if len(c := m.group(0).strip()) > 20]
 
     if not processed_clauses: processed_clauses = [raw_text]
          
-    results_list = []
-    for clause in processed_clauses:
-        results_list.append(analyze_single_clause(clause))
+    # Serve repeated/boilerplate clauses from cache; only misses go through the models
+    results_list, vectors, sem_probs = cached_analyses(processed_clauses, explain)
+    misses = [i for i, r in enumerate(results_list) if r is None]
+
+    if misses:
+        # Translate first, then classify every uncached clause (bar semantic hits) in one batched BERT forward
+        prepared = analyze_clauses_pre([processed_clauses[i] for i in misses], lang)
+        probs = classify_misses(misses, [text for text, _ in prepared], sem_probs)
+        # ...then run the per-clause tails concurrently
+        fresh = _pool.map(
+            lambda job: analyze_single_clause_post(processed_clauses[job[0]], job[1][0], job[1][1], job[2], explain),
+            zip(misses, prepared, probs),
+        )
+        for i, result, probs_row in zip(misses, fresh, probs):
+            results_list[i] = result
+            store_analysis(processed_clauses[i], result, vectors.get(i), explain, probs_row)
         
     return jsonify({"analysis_results": results_list})
 
 @app.route('/summarize', methods=['POST'])
 def summarize():
     text = request.json.get('text', '')
-    analysis = analyze_single_clause(text)
+    analysis = analyze_single_clause(text, explain=False, lang=request.json.get('lang'))
     return jsonify({"summary": analysis['rule_summary']})
 
 @app.route('/search_judgment', methods=['POST'])
@@ -410,22 +767,28 @@ def search_judgment():
     query_vector = get_judgment_embedding(clause_text)
     if query_vector is None: return jsonify({"error": "Embedding model failed"}), 500
 
-    D, I = faiss_index.search(query_vector.astype('float32'), top_k)
+    query_vector = np.ascontiguousarray(query_vector, dtype='float32')
+    # IVF-PQ / FlatIP indexes (scripts/build_faiss_ivfpq.py) store normalized vectors: score is cosine
+    is_ip = faiss_index.metric_type == faiss.METRIC_INNER_PRODUCT
+    if is_ip: faiss.normalize_L2(query_vector)
+
+    D, I = faiss_index.search(query_vector, top_k)
 
     results = []
     for i, idx in enumerate(I[0]):
         if idx != -1: 
-            meta = faiss_meta[idx]
+            meta = judgment_meta(idx)
             results.append({
                 "judgment_id": meta["judgment_id"],
                 "case_name": meta["case_name"],
                 "year": meta["year"],
                 "text_snippet": meta["text"],
-                "similarity_score": float(1 / (1 + D[0][i]))
+                "similarity_score": float(D[0][i]) if is_ip else float(1 / (1 + D[0][i]))
             })
 
     return jsonify({"results": results})
 
 if __name__ == '__main__':
+    ensure_resources()
     print("🚀 Starting LexSaksham Server on port 5000...")
     app.run(port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Gunicorn config for the LexSaksham AI service.
+
+Usage (from backend/ai_service):
+    gunicorn -c gunicorn.conf.py app:app
+
+preload_app imports app.py once in the master. LEXSAKSHAM_PRELOAD makes that import load the
+models, FAISS index and label map before workers are forked, so read-only weight pages are
+shared copy-on-write instead of being loaded again in every worker.
+"""
+
+import os
+
+os.environ.setdefault("LEXSAKSHAM_PRELOAD", "1")
+
+bind = os.getenv("LEXSAKSHAM_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("LEXSAKSHAM_WORKERS", "2"))
+preload_app = True
+timeout = 120  # first requests may still compile models / call OpenRouter
@@ -1,20 +1,42 @@
 """
-Safe atomic JSONL logging utilities for LexSaksham predictions.
+JSONL logging utilities for LexSaksham predictions.
 
-Provides thread-safe append for prediction logs without requiring a separate logging service.
+Provides append for prediction logs without requiring a separate logging service.
+Each log file is opened once with O_APPEND and every record goes out as one write()
+of the complete line, so lines from threads and from separate gunicorn worker
+processes never interleave. Prediction logs are telemetry, so lines are not
+fsync'ed unless LEXSAKSHAM_LOG_FSYNC=1 is set.
 """
 
 import json
 import os
+import threading
 from pathlib import Path
 from typing import Dict, Any
 
 
+LOG_FSYNC = os.getenv("LEXSAKSHAM_LOG_FSYNC", "0") == "1"
+
+_log_lock = threading.Lock()
+_log_fds = {}  # logpath -> O_APPEND file descriptor
+
+
+def _get_log_fd(logpath: str) -> int:
+    """Return the shared O_APPEND descriptor for logpath, opening it on first use. Caller holds _log_lock."""
+    fd = _log_fds.get(logpath)
+    if fd is None:
+        Path(logpath).parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(logpath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        _log_fds[logpath] = fd
+    return fd
+
+
 def append_prediction_log(logpath: str, data_dict: Dict[str, Any]) -> None:
     """
-    Atomically append a JSON line to prediction log file.
+    Append a JSON line to prediction log file.
 
-    Safe for concurrent writes (uses exclusive open mode).
+    Safe for concurrent writes from threads and processes: the whole line is one
+    unbuffered write() on an O_APPEND descriptor.
 
     Args:
         logpath: Path to predictions.jsonl file.
@@ -24,19 +46,14 @@ def append_prediction_log(logpath: str, data_dict: Dict[str, Any]) -> None:
 
     Returns:
         None
-
-    Raises:
-        IOError: If file cannot be opened/written.
     """
     try:
-        # Ensure parent directory exists
-        Path(logpath).parent.mkdir(parents=True, exist_ok=True)
-
-        # Append JSON line atomically
-        with open(logpath, "a", encoding="utf-8") as f:
-            f.write(json.dumps(data_dict) + "\n")
-            f.flush()
-            os.fsync(f.fileno())  # Force filesystem sync
+        line = (json.dumps(data_dict) + "\n").encode("utf-8")
+        with _log_lock:
+            fd = _get_log_fd(logpath)
+            os.write(fd, line)
+            if LOG_FSYNC:
+                os.fsync(fd)
     except Exception as e:
         print(f"⚠️ Failed to append to prediction log {logpath}: {e}")
         # Do not raise—logging failure should not crash the request
@@ -0,0 +1,36 @@
+"""
+Shared JSONL helpers for the scripts in this folder
+---------------------------------------------------
+Uses orjson when it is installed and stdlib json otherwise. Both backends read
+bytes or str, and both raise json.JSONDecodeError on bad input (orjson's error
+subclasses it), so callers only need to catch that one exception.
+
+    from _jsonl import loads, dumps_line, read_jsonl
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps_line(obj) -> bytes:
+        """One compact UTF-8 JSONL line, trailing newline included."""
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    loads = json.loads
+
+    def dumps_line(obj) -> bytes:
+        """One compact UTF-8 JSONL line, trailing newline included."""
+        return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def read_jsonl(path) -> list:
+    """Every non-blank line of a JSONL file, parsed."""
+    with open(path, "rb") as f:
+        return [loads(line) for line in f if line.strip()]
@@ -0,0 +1,22 @@
+"""
+ROUGE scoring for evaluate_summarizer's worker processes
+--------------------------------------------------------
+Kept apart from evaluate_summarizer so each spawned worker only needs
+rouge_score, not torch/transformers.
+"""
+
+from rouge_score import rouge_scorer
+
+
+ROUGE_TYPES = ["rouge1", "rouge2", "rougeL"]
+_scorer = None  # one RougeScorer per scoring worker process
+
+
+def init_scorer():
+    global _scorer
+    _scorer = rouge_scorer.RougeScorer(ROUGE_TYPES, use_stemmer=True)
+
+
+def score_pairs(pairs):
+    """ROUGE F-measures for (reference, prediction) pairs; runs in a pool worker."""
+    return [{k: s[k].fmeasure for k in ROUGE_TYPES} for s in (_scorer.score(ref, pred) for ref, pred in pairs)]
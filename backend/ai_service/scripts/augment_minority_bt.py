@@ -1,71 +1,97 @@
 # backend/ai_service/scripts/augment_minority_bt.py
-import importlib.util
 import json
+import multiprocessing as mp
+import os
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# Path to translate utils in your repo
-TRANSLATE_UTILS_PATH = Path("backend/ai_service/utils/translate_utils.py")
+import torch
 
-def load_translate_utils(path: Path):
-    if not path.exists():
-        print("translate_utils.py not found at", path)
-        return None
-    spec = importlib.util.spec_from_file_location("translate_utils", str(path))
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return mod
+from _jsonl import read_jsonl
 
-translate_mod = load_translate_utils(TRANSLATE_UTILS_PATH)
+# Make backend/ai_service importable so translate_utils (and its cached models) is a normal module
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.translate_utils import translate_batch
 
-# Fallback wrappers if functions not present
-def translate_to_en(text, src_hint=None):
-    if translate_mod and hasattr(translate_mod, "translate_to_en"):
-        return translate_mod.translate_to_en(text, src_hint=src_hint)
-    return text
+BATCH_SIZE = 32  # sentences per NMT generate call
+MAX_LENGTH = 128  # output token cap; decode cost is O(output_length)
+# Keep paraphrases whose word count is within ~25% of the original
+MIN_LEN_RATIO, MAX_LEN_RATIO = 0.75, 1.33
 
-def translate_to_hi(text, src_hint=None):
-    if translate_mod and hasattr(translate_mod, "translate_to_hi"):
-        return translate_mod.translate_to_hi(text, src_hint=src_hint)
-    return text
+# Clauses are English; each pivot gives one en -> pivot -> en paraphrase and runs in its own process
+SRC_LANG = "en"
+PIVOTS = ["hi", "fr", "de", "es"]
 
-# Files (use train_relabelled if you created it)
-SRC = Path("backend/ai_service/datasets/clause_dataset/prepared/train_relabelled.jsonl")
-if not SRC.exists():
-    SRC = Path("backend/ai_service/datasets/clause_dataset/prepared/train_int.jsonl")
-OUT = Path("backend/ai_service/datasets/clause_dataset/prepared/train_aug_bt.jsonl")
+def back_translate(pivot, texts):
+    """Round-trip `texts` through `pivot` in this worker process (models load once per worker)."""
+    if not torch.cuda.is_available():
+        # Split the cores between pivot workers instead of every worker grabbing all of them
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // len(PIVOTS)))
+    there = translate_batch(texts, SRC_LANG, pivot, batch_size=BATCH_SIZE, max_length=MAX_LENGTH)
+    back = translate_batch(there, pivot, SRC_LANG, batch_size=BATCH_SIZE, max_length=MAX_LENGTH)
+    return pivot, back
 
-print("Using source:", SRC)
-lines = [json.loads(l) for l in SRC.read_text(encoding="utf-8").splitlines()]
+def keep_paraphrase(text, back):
+    """Reject empty, identical (case/whitespace-insensitive) and length-drifted back-translations."""
+    if not back or not back.strip() or back.strip().lower() == text.strip().lower():
+        return False
+    ratio = len(back.split()) / max(1, len(text.split()))
+    return MIN_LEN_RATIO <= ratio <= MAX_LEN_RATIO
 
-# group by label
-by_label = {}
-for obj in lines:
-    lbl = str(obj.get("label"))
-    by_label.setdefault(lbl, []).append(obj)
+def main():
+    # Files (use train_relabelled if you created it)
+    SRC = Path("backend/ai_service/datasets/clause_dataset/prepared/train_relabelled.jsonl")
+    if not SRC.exists():
+        SRC = Path("backend/ai_service/datasets/clause_dataset/prepared/train_int.jsonl")
+    OUT = Path("backend/ai_service/datasets/clause_dataset/prepared/train_aug_bt.jsonl")
 
-augmented = []
-for lbl, samples in by_label.items():
-    # only augment rare classes (threshold tweakable)
-    if len(samples) >= 300:
-        continue
-    n_aug_per_sample = 1  # how many new paraphrases per sample
-    for s in samples:
-        text = s.get("text", "")
-        # Try a safe back-translation pair:
-        try:
-            en = translate_to_en(text, src_hint="auto")
-            back = translate_to_hi(en)
-            if back and back.strip() and back != text:
-                new = dict(s)
-                new["text"] = back
-                augmented.append(new)
-        except Exception as e:
-            # skip if translation fails
-            continue
+    print("Using source:", SRC)
+    lines = read_jsonl(SRC)
 
-print("Original:", len(lines), "Augmented extra:", len(augmented))
-out_lines = lines + augmented
-random.shuffle(out_lines)
-OUT.write_text("\n".join(json.dumps(x, ensure_ascii=False) for x in out_lines), encoding="utf-8")
-print("Wrote", OUT, "len:", len(out_lines))
+    # group by label
+    by_label = {}
+    for obj in lines:
+        lbl = str(obj.get("label"))
+        by_label.setdefault(lbl, []).append(obj)
+
+    # only augment rare classes (threshold tweakable); up to one paraphrase per sample per pivot
+    minority = [s for lbl, samples in by_label.items() if len(samples) < 300 for s in samples]
+    texts = [s.get("text", "") for s in minority]
+
+    # Back-translate through every pivot in parallel; spawn keeps CUDA usable in the workers
+    augmented = []
+    seen = set()  # (sample index, paraphrase): pivots often agree, keep each paraphrase once
+    with ProcessPoolExecutor(max_workers=len(PIVOTS), mp_context=mp.get_context("spawn")) as pool:
+        futures = [pool.submit(back_translate, pivot, texts) for pivot in PIVOTS]
+        for fut in futures:
+            try:
+                pivot, backs = fut.result()
+            except Exception as e:
+                # skip this pivot if translation fails
+                print("Back-translation failed:", e)
+                continue
+            kept = 0
+            for i, (s, text, back) in enumerate(zip(minority, texts, backs)):
+                key = (i, back.strip().lower())
+                if key not in seen and keep_paraphrase(text, back):
+                    seen.add(key)
+                    new = dict(s)
+                    new["text"] = back
+                    augmented.append(new)
+                    kept += 1
+            print(f"Pivot {pivot}: kept {kept}/{len(texts)} paraphrases")
+
+    print("Original:", len(lines), "Augmented extra:", len(augmented))
+    out_lines = lines + augmented
+    random.shuffle(out_lines)
+    # Stream one record per line instead of joining the whole dataset into one string
+    with OUT.open("w", encoding="utf-8") as f:
+        for x in out_lines:
+            f.write(json.dumps(x, ensure_ascii=False))
+            f.write("\n")
+    print("Wrote", OUT, "len:", len(out_lines))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
+import numpy as np
 import pandas as pd
 import json
 import random
 from pathlib import Path
-from sklearn.model_selection import train_test_split
 
 # CONFIGURATION
 INPUT_CSV = "backend/ai_service/models/prepared_data.csv"
@@ -13,6 +13,7 @@ OUTPUT_MAP = "backend/ai_service/datasets/label_map.json"
 # CHANGE THIS to the string name of your majority class found in the logs
 MAJORITY_CLASS_NAME = "Obligations" 
 KEEP_RATIO = 0.3  # Keep only 30% of this class
+TEST_RATIO = 0.1  # Held-out share of every label
 
 def balance_and_convert():
     path = Path(INPUT_CSV)
@@ -21,7 +22,13 @@ def balance_and_convert():
         return
 
     print(f"Reading {path}...")
-    df = pd.read_csv(path)
+    # Only the text/label columns are used: skip the rest and read the labels as categoricals.
+    # Text stays object dtype so missing values remain float NaN, which json.dumps can write.
+    df = pd.read_csv(
+        path,
+        usecols=lambda c: c in {'clause_text', 'clause_type', 'text', 'label'},
+        dtype={'clause_type': 'category', 'label': 'category'},
+    )
     
     # 1. Rename columns if needed
     if 'clause_text' in df.columns:
@@ -29,8 +36,16 @@ def balance_and_convert():
     if 'clause_type' in df.columns:
         df = df.rename(columns={'clause_type': 'label'})
 
+    # Rows without a label would get category code -1 and be written out as "label": -1
+    n_unlabeled = int(df['label'].isna().sum())
+    if n_unlabeled:
+        print(f"Dropping {n_unlabeled} rows with no label.")
+        df = df.dropna(subset=['label']).reset_index(drop=True)
+
     # 2. Generate Label Mapping (String -> Int)
-    unique_labels = sorted(df['label'].unique())
+    # Categorical categories are the sorted unique labels, so the codes ARE the label ids
+    df['label'] = df['label'].astype('category')
+    unique_labels = list(df['label'].cat.categories)
     label_map = {label: idx for idx, label in enumerate(unique_labels)}
     
     print(f"Generated Mapping for {len(unique_labels)} classes.")
@@ -39,35 +54,50 @@ def balance_and_convert():
         json.dump(label_map, f, indent=2)
     print(f"Saved label map to {OUTPUT_MAP}")
 
-    # 3. Downsample
-    print(f"Original Count for '{MAJORITY_CLASS_NAME}': {len(df[df['label'] == MAJORITY_CLASS_NAME])}")
-    
-    df_majority = df[df['label'] == MAJORITY_CLASS_NAME]
-    df_others = df[df['label'] != MAJORITY_CLASS_NAME]
+    # 3. Downsample (one mask scan + one integer take, no concat)
+    maj_mask = (df['label'] == MAJORITY_CLASS_NAME).to_numpy()
+    maj_idx = np.flatnonzero(maj_mask)
+    print(f"Original Count for '{MAJORITY_CLASS_NAME}': {len(maj_idx)}")
 
-    if len(df_majority) > 0:
-        df_majority_downsampled = df_majority.sample(frac=KEEP_RATIO, random_state=42)
-        print(f"Downsampled '{MAJORITY_CLASS_NAME}' to {len(df_majority_downsampled)} rows.")
-        df_balanced = pd.concat([df_others, df_majority_downsampled])
+    rng = np.random.default_rng(42)
+    if len(maj_idx) > 0:
+        keep_maj = rng.choice(maj_idx, size=int(round(len(maj_idx) * KEEP_RATIO)), replace=False)
+        print(f"Downsampled '{MAJORITY_CLASS_NAME}' to {len(keep_maj)} rows.")
     else:
         print(f"WARNING: Class '{MAJORITY_CLASS_NAME}' not found! Check spelling.")
-        df_balanced = df_others
+        keep_maj = maj_idx
 
-    # Shuffle
-    df_balanced = df_balanced.sample(frac=1, random_state=42).reset_index(drop=True)
+    # Shuffle the kept row positions directly, then take them in one go
+    keep = rng.permutation(np.concatenate([np.flatnonzero(~maj_mask), keep_maj]))
+    df_balanced = df.iloc[keep].reset_index(drop=True)
 
-    # 4. Map strings to Integers
-    df_balanced['label_id'] = df_balanced['label'].map(label_map)
+    # 4. Map strings to Integers (vectorized category-code lookup)
+    df_balanced['label_id'] = df_balanced['label'].cat.codes.astype('int32')
+    assert (df_balanced['label_id'] >= 0).all(), "unlabeled rows reached label encoding"
 
     # 5. Split Train/Test
     # We create a FRESH test set here to ensure IDs match the new training set
-    train_df, test_df = train_test_split(df_balanced, test_size=0.1, random_state=42, stratify=df_balanced['label_id'])
+    # Stratified 10% per label, done on index arrays: one sort groups rows by label, one take per side
+    label_ids = df_balanced['label_id'].to_numpy()
+    order = np.argsort(label_ids, kind='stable')
+    _, starts, counts = np.unique(label_ids[order], return_index=True, return_counts=True)
+    test_idx = []
+    for start, count in zip(starts, counts):
+        group = rng.permutation(order[start:start + count])
+        test_idx.append(group[:max(1, int(round(TEST_RATIO * count)))] if count > 1 else group[:0])
+    test_idx = np.sort(np.concatenate(test_idx))
+    train_mask = np.ones(len(label_ids), dtype=bool)
+    train_mask[test_idx] = False
+    train_df = df_balanced.iloc[np.flatnonzero(train_mask)]
+    test_df = df_balanced.iloc[test_idx]
 
     def save_jsonl(dataframe, filepath):
+        # Pull the two columns out once instead of building a Series per row with iterrows()
+        texts = dataframe['text'].to_numpy()
+        label_ids = dataframe['label_id'].to_numpy(dtype='int32')
         with open(filepath, 'w', encoding='utf-8') as f:
-            for _, row in dataframe.iterrows():
-                # Save 'label' as the INTEGER ID
-                f.write(json.dumps({"text": row['text'], "label": int(row['label_id'])}) + "\n")
+            # Save 'label' as the INTEGER ID
+            f.writelines(json.dumps({"text": text, "label": int(label_id)}) + "\n" for text, label_id in zip(texts, label_ids))
 
     print(f"Saving new balanced TRAIN file to {OUTPUT_TRAIN}...")
     save_jsonl(train_df, OUTPUT_TRAIN)
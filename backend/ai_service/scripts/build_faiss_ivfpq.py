@@ -0,0 +1,82 @@
+"""
+Rebuild the Judgment FAISS Index as IVF-PQ (inner product)
+----------------------------------------------------------
+Reads the existing judgments.index (any FAISS index that supports reconstruct,
+e.g. the original IndexFlatL2), L2-normalizes the stored vectors and writes an
+IndexIVFPQ with METRIC_INNER_PRODUCT to a separate judgments_ivfpq.index, so
+app.py can return cosine similarity directly instead of the 1/(1+D) conversion.
+The source index is left untouched; app.py serves the new file only when
+FAISS_INDEX_PATH points at it.
+
+Small corpora that cannot train PQ codebooks (fewer than 256 * 39 vectors) are
+written as a normalized IndexFlatIP instead, which app.py treats the same way.
+
+Usage:
+    python backend/ai_service/scripts/build_faiss_ivfpq.py \\
+        --src backend/ai_service/indexes/judgments.index \\
+        --out backend/ai_service/indexes/judgments_ivfpq.index
+
+    FAISS_INDEX_PATH=backend/ai_service/indexes/judgments_ivfpq.index python backend/ai_service/app.py
+"""
+
+import argparse
+import math
+import os
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+
+BASE_AI = Path(__file__).resolve().parents[1]
+INDEX_PATH = BASE_AI / "indexes" / "judgments.index"
+IVFPQ_PATH = BASE_AI / "indexes" / "judgments_ivfpq.index"
+
+# FAISS warns below ~39 training points per centroid; PQ with nbits=8 has 256 centroids per sub-quantizer
+MIN_PQ_TRAIN = 256 * 39
+
+
+def build_index(xb: np.ndarray, m: int, nbits: int) -> faiss.Index:
+    n, d = xb.shape
+    if n < MIN_PQ_TRAIN or d % m != 0:
+        print(f"⚠️ {n} vectors (d={d}, m={m}) is too few for IVF-PQ, writing IndexFlatIP instead.")
+        index = faiss.IndexFlatIP(d)
+        index.add(xb)
+        return index
+
+    nlist = max(1, int(math.sqrt(n)))
+    quantizer = faiss.IndexFlatIP(d)
+    index = faiss.IndexIVFPQ(quantizer, d, nlist, m, nbits, faiss.METRIC_INNER_PRODUCT)
+    print(f"⏳ Training IndexIVFPQ (nlist={nlist}, m={m}, nbits={nbits}) on {n} vectors...")
+    index.train(xb)
+    index.add(xb)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--src", type=str, default=str(INDEX_PATH), help="Existing FAISS index to convert")
+    parser.add_argument("--out", type=str, default=str(IVFPQ_PATH), help="Where to write the IVF-PQ index")
+    parser.add_argument("--m", type=int, default=64, help="PQ sub-quantizers (must divide the embedding dim)")
+    parser.add_argument("--nbits", type=int, default=8, help="Bits per PQ code")
+    parser.add_argument("--force", action="store_true", help="Allow --out to overwrite --src")
+    args = parser.parse_args()
+
+    # PQ is lossy: overwriting the source would throw away the exact vectors for good
+    if Path(args.out).resolve() == Path(args.src).resolve() and not args.force:
+        parser.error("--out is the same file as --src; pass --force to overwrite the source index")
+
+    faiss.omp_set_num_threads(os.cpu_count() or 1)
+
+    src = faiss.read_index(args.src)
+    print(f"✅ Loaded {args.src} ({src.ntotal} vectors, d={src.d}).")
+    xb = np.ascontiguousarray(src.reconstruct_n(0, src.ntotal), dtype="float32")
+    faiss.normalize_L2(xb)
+
+    index = build_index(xb, args.m, args.nbits)
+    faiss.write_index(index, args.out)
+    print(f"✅ Saved {type(index).__name__} with {index.ntotal} vectors to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
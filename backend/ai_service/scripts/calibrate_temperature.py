@@ -12,6 +12,7 @@ Usage:
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import sys
@@ -21,6 +22,8 @@ import numpy as np
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+from _jsonl import loads
+
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -50,6 +53,10 @@ def load_model_and_tokenizer(model_dir: str, device: str):
 
         model = model.to(device_t)
         model.eval()
+        if device_t.type == "cuda":
+            # Bandwidth-bound BERT forward: fp16 weights/activations, TF32 for any fp32 matmuls
+            model = model.half()
+            torch.backends.cuda.matmul.allow_tf32 = True
         logger.info("Model loaded successfully.")
         return tokenizer, model, device_t
     except Exception as e:
@@ -65,12 +72,12 @@ def load_validation_set(valset_path: str) -> list:
     """
     examples = []
     try:
-        with open(valset_path, "r", encoding="utf-8") as f:
+        with open(valset_path, "rb") as f:
             for line_num, line in enumerate(f, 1):
                 if not line.strip():
                     continue
                 try:
-                    data = json.loads(line)
+                    data = loads(line)
                     text = data.get("text", "")
                     label = data.get("label")
                     label_idx = data.get("label_idx")
@@ -100,82 +107,99 @@ def load_validation_set(valset_path: str) -> list:
         sys.exit(1)
 
 
-def collect_logits_and_labels(examples: list, tokenizer, model, device: str, max_length: int = 256):
+def token_cache_path(valset_path: str, model_dir: str, max_length: int) -> Path:
+    """Cache file for the tokenized valset, keyed by (model, max_length, valset mtime)."""
+    valset = Path(valset_path)
+    key = f"{Path(model_dir).resolve() if Path(model_dir).exists() else model_dir}|{max_length}|{valset.stat().st_mtime_ns}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return valset.with_name(f"{valset.name}.tok-{digest}.pt")
+
+
+def tokenize_examples(examples: list, tokenizer, max_length: int = 256) -> dict:
+    """Tokenize all texts in one fast-tokenizer call; ids stay unpadded so batches pad only to their own max."""
+    enc = tokenizer([example["text"] for example in examples], truncation=True, max_length=max_length)
+    labels = torch.tensor([example["label_idx"] for example in examples], dtype=torch.long)
+    return {"input_ids": enc["input_ids"], "labels": labels}
+
+
+def collect_logits_and_labels(encoded: dict, tokenizer, model, device: str, batch_size: int = 32):
     """
     Collect model logits and true labels for all examples.
 
+    Pre-tokenized inputs (see tokenize_examples) are padded and scored `batch_size` at a time.
+
     Returns:
-        logits_list: list of numpy arrays (num_examples, num_classes)
-        labels_list: list of true label indices
+        logits: numpy array (num_examples, num_classes), float32
+        labels: numpy array (num_examples,) of true label indices
     """
-    logits_list = []
-    labels_list = []
+    input_ids = encoded["input_ids"]
+    labels = encoded["labels"].numpy()
+    all_logits = []
 
     logger.info("Collecting logits from model...")
-    with torch.no_grad():
-        for i, example in enumerate(examples):
-            if (i + 1) % 100 == 0:
-                logger.info(f"  Processed {i + 1}/{len(examples)}")
+    with torch.inference_mode():
+        for start in range(0, len(input_ids), batch_size):
+            inputs = tokenizer.pad(
+                {"input_ids": input_ids[start:start + batch_size]},
+                return_tensors="pt"
+            ).to(device)
+
+            # Forward pass; upcast so fp16 (CUDA) logits calibrate in float32
+            all_logits.append(model(**inputs).logits.float().cpu().numpy())
 
-            text = example["text"]
-            label_idx = example["label_idx"]
+            done = min(start + batch_size, len(input_ids))
+            if done % 320 == 0 or done == len(input_ids):
+                logger.info(f"  Processed {done}/{len(input_ids)}")
 
-            # Tokenize
-            inputs = tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=max_length
-            )
-            inputs = {k: v.to(device) for k, v in inputs.items()}
+    logits = np.concatenate(all_logits, axis=0) if all_logits else np.zeros((0, 0), dtype=np.float32)
+    logger.info(f"Collected logits for {len(logits)} examples")
+    return logits, labels
 
-            # Forward pass
-            outputs = model(**inputs)
-            logits = outputs.logits.cpu().numpy()  # shape: (1, num_classes)
 
-            logits_list.append(logits[0])  # Remove batch dimension
-            labels_list.append(label_idx)
+def nll_loss(logits: np.ndarray, labels: np.ndarray, T: float) -> float:
+    """Mean NLL of temperature-scaled logits: logsumexp(logits/T) - logits[true]/T, without materializing softmax."""
+    from scipy.special import logsumexp
 
-    logger.info(f"Collected logits for {len(logits_list)} examples")
-    return np.array(logits_list), np.array(labels_list)
+    if T <= 0:
+        return float("inf")
+    scaled = logits / T
+    return float(logsumexp(scaled, axis=1).mean() - scaled[np.arange(len(labels)), labels].mean())
 
 
 def compute_temperature(logits: np.ndarray, labels: np.ndarray, num_iterations: int = 100) -> float:
     """
     Find optimal temperature T by minimizing NLL on validation set.
 
-    Uses scipy.optimize.minimize on a simple scalar optimization.
+    The NLL is smooth and convex in the scalar T, so a torch LBFGS solve converges in a
+    handful of evaluations; F.cross_entropy computes log-softmax + gather in one fused op.
 
     Args:
         logits: shape (num_examples, num_classes)
         labels: shape (num_examples,) with true label indices
+        num_iterations: maximum LBFGS iterations
 
     Returns:
         Optimal temperature T > 0
     """
-    from scipy.optimize import minimize_scalar
+    import torch.nn.functional as F
 
-    def nll_loss(T: float) -> float:
-        """Negative log-likelihood with temperature scaling."""
-        if T <= 0:
-            return 1e10
+    logits_t = torch.from_numpy(np.asarray(logits, dtype=np.float32))
+    labels_t = torch.from_numpy(np.asarray(labels)).long()
+    T = torch.tensor(1.0, requires_grad=True)
+    optimizer = torch.optim.LBFGS([T], lr=0.1, max_iter=num_iterations, line_search_fn="strong_wolfe")
 
-        # Scale logits by temperature
-        scaled_logits = logits / T
-        # Compute softmax probabilities
-        exp_logits = np.exp(scaled_logits - np.max(scaled_logits, axis=1, keepdims=True))
-        probs = exp_logits / np.sum(exp_logits, axis=1, keepdims=True)
-
-        # NLL: -log(p_true_class)
-        nll = -np.log(probs[np.arange(len(labels)), labels] + 1e-10)
-        return np.mean(nll)
+    def closure():
+        optimizer.zero_grad()
+        loss = F.cross_entropy(logits_t / T.clamp(min=1e-3), labels_t)
+        loss.backward()
+        return loss
 
     logger.info("Optimizing temperature T...")
-    result = minimize_scalar(nll_loss, bounds=(0.1, 5.0), method="bounded")
+    optimizer.step(closure)
 
-    T_opt = result.x
-    loss_opt = result.fun
+    T_opt = float(T.detach().clamp(min=1e-3))
+    with torch.inference_mode():
+        loss_opt = float(F.cross_entropy(logits_t / T_opt, labels_t))
 
     logger.info(f"Optimal temperature T = {T_opt:.4f}, NLL = {loss_opt:.4f}")
     return T_opt
@@ -209,20 +233,42 @@ def main():
         default="cuda" if torch.cuda.is_available() else "cpu",
         help="Device: cuda or cpu"
     )
+    parser.add_argument(
+        "--max-length",
+        type=int,
+        default=256,
+        help="Tokenizer truncation length"
+    )
+    parser.add_argument(
+        "--no-token-cache",
+        action="store_true",
+        help="Re-tokenize the validation set instead of reusing the cached .pt next to it"
+    )
 
     args = parser.parse_args()
 
     # Load model
     tokenizer, model, device = load_model_and_tokenizer(args.model, args.device)
 
-    # Load validation set
-    examples = load_validation_set(args.valset)
-    if not examples:
-        logger.error("No valid examples in validation set.")
+    # Load tokenized validation set (re-tokenize only when model, max_length or the file changed)
+    if not Path(args.valset).exists():
+        logger.error(f"Validation set not found: {args.valset}")
         sys.exit(1)
+    cache_path = token_cache_path(args.valset, args.model, args.max_length)
+    if cache_path.exists() and not args.no_token_cache:
+        encoded = torch.load(cache_path)
+        logger.info(f"Loaded {len(encoded['input_ids'])} tokenized examples from {cache_path}")
+    else:
+        examples = load_validation_set(args.valset)
+        if not examples:
+            logger.error("No valid examples in validation set.")
+            sys.exit(1)
+        encoded = tokenize_examples(examples, tokenizer, args.max_length)
+        torch.save(encoded, cache_path)
+        logger.info(f"Cached tokenized validation set to {cache_path}")
 
     # Collect logits
-    logits, labels = collect_logits_and_labels(examples, tokenizer, model, device)
+    logits, labels = collect_logits_and_labels(encoded, tokenizer, model, device)
 
     # Compute temperature
     T_opt = compute_temperature(logits, labels)
@@ -239,10 +285,8 @@ def main():
     logger.info(f"Result: {result}")
 
     # Sanity check: compute NLL before/after
-    from scipy.special import softmax as scipy_softmax
-
-    nll_before = -np.log(scipy_softmax(logits, axis=1)[np.arange(len(labels)), labels] + 1e-10).mean()
-    nll_after = -np.log(scipy_softmax(logits / T_opt, axis=1)[np.arange(len(labels)), labels] + 1e-10).mean()
+    nll_before = nll_loss(logits, labels, 1.0)
+    nll_after = nll_loss(logits, labels, T_opt)
 
     logger.info(f"NLL before calibration: {nll_before:.4f}")
     logger.info(f"NLL after calibration:  {nll_after:.4f}")
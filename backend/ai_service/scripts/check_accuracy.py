@@ -7,7 +7,7 @@ import os
 # ==========================================
 # CONFIGURATION
 # ==========================================
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODELS_DIR = os.path.join(BASE_DIR, "models")
 MODEL_PATH = os.path.join(MODELS_DIR, "legalbert_clause_classifier")
 CSV_PATH = os.path.join(MODELS_DIR, "prepared_data.csv")
@@ -16,74 +16,97 @@ CSV_PATH = os.path.join(MODELS_DIR, "prepared_data.csv")
 TEXT_COL = "clause_text"
 LABEL_COL = "clause_type"
 
+BATCH_SIZE = 32
+
 # ==========================================
 # 1. LOAD DATA & BUILD LABEL MAP
 # ==========================================
-print(f"📂 Loading data from: {CSV_PATH}")
-if os.path.exists(CSV_PATH):
-    df = pd.read_csv(CSV_PATH)
+def load_data():
+    """Returns (df, id2label), or (None, None) when the CSV is missing."""
+    print(f"📂 Loading data from: {CSV_PATH}")
+    if not os.path.exists(CSV_PATH):
+        print("❌ ERROR: Data file not found.")
+        return None, None
+    df = pd.read_csv(CSV_PATH, usecols=[TEXT_COL, LABEL_COL], dtype={TEXT_COL: 'string', LABEL_COL: 'category'})
     print(f"✅ Loaded {len(df)} rows.")
-else:
-    print("❌ ERROR: Data file not found.")
-    exit()
-
-# --- CRITICAL FIX: REBUILD THE LABEL MAP ---
-# We assume the model was trained on these labels sorted alphabetically.
-# This converts ["Indemnity", "Liability"] -> {0: "Indemnity", 1: "Liability"}
-unique_labels = sorted(df[LABEL_COL].dropna().unique().tolist())
-id2label = {i: label for i, label in enumerate(unique_labels)}
-label2id = {label: i for i, label in enumerate(unique_labels)}
-
-print(f"🔧 Reconstructed Label Map ({len(id2label)} classes):")
-print(f"   ID 0 -> {id2label[0]}")
-print(f"   ID 1 -> {id2label[1]}")
-print(f"   ... and {len(id2label)-2} more.")
+
+    # --- CRITICAL FIX: REBUILD THE LABEL MAP ---
+    # We assume the model was trained on these labels sorted alphabetically.
+    # This converts ["Indemnity", "Liability"] -> {0: "Indemnity", 1: "Liability"}
+    unique_labels = sorted(df[LABEL_COL].dropna().unique().tolist())
+    id2label = {i: label for i, label in enumerate(unique_labels)}
+
+    print(f"🔧 Reconstructed Label Map ({len(id2label)} classes):")
+    print(f"   ID 0 -> {id2label[0]}")
+    print(f"   ID 1 -> {id2label[1]}")
+    print(f"   ... and {len(id2label)-2} more.")
+    return df, id2label
 
 # ==========================================
 # 2. LOAD MODEL
 # ==========================================
-print(f"\n🤖 Loading model...")
-try:
+def load_classifier():
+    """Load the clause classifier once (eval, fp16 on CUDA). Returns (tokenizer, model, device)."""
+    print(f"\n🤖 Loading model...")
     tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
     model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
-    print("✅ Model loaded.")
-except Exception as e:
-    print(f"❌ ERROR: {e}")
-    exit()
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model.to(device).eval()
+    if device == "cuda": model.half()
+    print(f"✅ Model loaded on {device}.")
+    return tokenizer, model, device
 
 # ==========================================
 # 3. RUN PREDICTIONS
 # ==========================================
-print("\n🔮 Running predictions on first 50 rows...")
-sample_df = df.head(50).copy()
+def predict_batch(texts, tokenizer, model, device):
+    """One padded tokenize + forward per BATCH_SIZE texts. Missing texts get ID 0."""
+    valid = [i for i, t in enumerate(texts) if isinstance(t, str)]
+    pred_ids = [0] * len(texts)
+    for start in range(0, len(valid), BATCH_SIZE):
+        idx = valid[start:start + BATCH_SIZE]
+        inputs = tokenizer([texts[i] for i in idx], return_tensors="pt", truncation=True, padding=True, max_length=512).to(device)
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+        for i, pred in zip(idx, logits.argmax(dim=1).cpu().tolist()):
+            pred_ids[i] = pred
+    return pred_ids
 
-def predict(text):
-    if not isinstance(text, str): return 0
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    with torch.no_grad():
-        logits = model(**inputs).logits
-    predicted_id = torch.argmax(logits, dim=1).item()
-    return predicted_id
+def check_accuracy(tokenizer, model, device, df, id2label, n_rows=50):
+    print(f"\n🔮 Running predictions on first {n_rows} rows...")
+    sample_df = df.head(n_rows).copy()
 
-# 1. Get the ID (0, 1, 2...)
-sample_df['predicted_id'] = sample_df[TEXT_COL].apply(predict)
+    # 1. Get the ID (0, 1, 2...)
+    sample_df['predicted_id'] = predict_batch(sample_df[TEXT_COL].tolist(), tokenizer, model, device)
 
-# 2. Convert ID to Text using our new map
-sample_df['predicted_label'] = sample_df['predicted_id'].map(id2label)
+    # 2. Convert ID to Text using our new map
+    sample_df['predicted_label'] = sample_df['predicted_id'].map(id2label)
 
-# ==========================================
-# 4. REPORT
-# ==========================================
-print("\n" + "="*40)
-print("       CORRECTED ACCURACY REPORT       ")
-print("="*40)
-
-# Compare Text vs Text
-print(classification_report(
-    sample_df[LABEL_COL], 
-    sample_df['predicted_label'],
-    zero_division=0
-))
-
-print("\nDEBUG CHECK:")
-print(sample_df[[LABEL_COL, 'predicted_label']].head(5))
\ No newline at end of file
+    # ==========================================
+    # 4. REPORT
+    # ==========================================
+    print("\n" + "="*40)
+    print("       CORRECTED ACCURACY REPORT       ")
+    print("="*40)
+
+    # Compare Text vs Text
+    print(classification_report(
+        sample_df[LABEL_COL],
+        sample_df['predicted_label'],
+        zero_division=0
+    ))
+
+    print("\nDEBUG CHECK:")
+    print(sample_df[[LABEL_COL, 'predicted_label']].head(5))
+
+
+if __name__ == "__main__":
+    df, id2label = load_data()
+    if df is None:
+        exit()
+    try:
+        tokenizer, model, device = load_classifier()
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        exit()
+    check_accuracy(tokenizer, model, device, df, id2label)
@@ -0,0 +1,61 @@
+"""
+Run All Model Smoke Checks in One Process
+-----------------------------------------
+check_accuracy.py, check_risk_model.py and check_summarizer.py each pay a cold
+from_pretrained load when run on their own. This script loads the clause
+classifier, risk model and T5 summarizer once and runs every check against the
+same in-memory models. A failing load or check is reported and the remaining
+checks still run.
+
+Usage:
+    python backend/ai_service/scripts/check_all.py [--skip accuracy risk summarizer]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ensure scripts dir is importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[0]))
+from check_accuracy import check_accuracy, load_classifier, load_data
+from check_risk_model import check_risk, load_risk_model
+from check_summarizer import check_summarizer, load_summarizer
+
+
+def run_accuracy():
+    df, id2label = load_data()
+    if df is not None:
+        check_accuracy(*load_classifier(), df, id2label)
+
+
+def run_risk():
+    check_risk(*load_risk_model())
+
+
+def run_summarizer():
+    check_summarizer(*load_summarizer())
+
+
+CHECKS = {"accuracy": run_accuracy, "risk": run_risk, "summarizer": run_summarizer}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip", nargs="*", default=[], choices=sorted(CHECKS), help="Checks to leave out")
+    args = parser.parse_args()
+
+    for name, run in CHECKS.items():
+        if name in args.skip:
+            continue
+        print(f"\n{'=' * 40}\n▶ {name}\n{'=' * 40}")
+        start = time.perf_counter()
+        try:
+            run()
+            print(f"✅ {name} done in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
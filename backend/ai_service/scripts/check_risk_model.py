@@ -6,34 +6,48 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_DIR, "models", "risk_assessment")
 
-print(f"📂 Loading Risk Model from: {MODEL_PATH}")
+TEST_TEXT = "The Service Provider shall be liable for all damages without limitation."
 
-try:
+
+def load_risk_model():
+    """Load the risk model once (eval, fp16 on CUDA). Returns (tokenizer, model, device)."""
+    print(f"📂 Loading Risk Model from: {MODEL_PATH}")
     tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
     model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
-    print("✅ Risk Model loaded successfully!")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model.to(device).eval()
+    if device == "cuda": model.half()
+    print(f"✅ Risk Model loaded successfully on {device}!")
     print(f"   Model expects {model.config.num_labels} labels.")
-except Exception as e:
-    print(f"❌ Error loading Risk Model: {e}")
-    print("   If this fails, it might not be a BERT model (could be a pickle file?).")
-    exit()
-
-# TEST PREDICTION
-test_text = "The Service Provider shall be liable for all damages without limitation."
-print(f"\n🧪 Testing with: '{test_text}'")
-
-inputs = tokenizer(test_text, return_tensors="pt", truncation=True, max_length=512)
-with torch.no_grad():
-    logits = model(**inputs).logits
-    probs = torch.softmax(logits, dim=1)[0]
-    pred_id = torch.argmax(logits, dim=1).item()
-
-print(f"   👉 Predicted ID: {pred_id}")
-print(f"   👉 Confidence: {probs[pred_id].item():.4f}")
-
-# CHECK LABELS
-if hasattr(model.config, 'id2label') and model.config.id2label:
-    print(f"   👉 Label Name: {model.config.id2label[pred_id]}")
-    print(f"   ℹ️  All Labels: {model.config.id2label}")
-else:
-    print("   ⚠️ No label names found in config. You need to map 0,1,2 manually.")
\ No newline at end of file
+    return tokenizer, model, device
+
+
+def check_risk(tokenizer, model, device, test_text=TEST_TEXT):
+    # TEST PREDICTION
+    print(f"\n🧪 Testing with: '{test_text}'")
+
+    inputs = tokenizer(test_text, return_tensors="pt", truncation=True, max_length=512).to(device)
+    with torch.inference_mode():
+        logits = model(**inputs).logits
+        probs = torch.softmax(logits, dim=1)[0]
+        pred_id = torch.argmax(logits, dim=1).item()
+
+    print(f"   👉 Predicted ID: {pred_id}")
+    print(f"   👉 Confidence: {probs[pred_id].item():.4f}")
+
+    # CHECK LABELS
+    if hasattr(model.config, 'id2label') and model.config.id2label:
+        print(f"   👉 Label Name: {model.config.id2label[pred_id]}")
+        print(f"   ℹ️  All Labels: {model.config.id2label}")
+    else:
+        print("   ⚠️ No label names found in config. You need to map 0,1,2 manually.")
+
+
+if __name__ == "__main__":
+    try:
+        tokenizer, model, device = load_risk_model()
+    except Exception as e:
+        print(f"❌ Error loading Risk Model: {e}")
+        print("   If this fails, it might not be a BERT model (could be a pickle file?).")
+        exit()
+    check_risk(tokenizer, model, device)
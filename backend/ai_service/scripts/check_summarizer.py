@@ -1,35 +1,71 @@
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import torch
 import os
 
+try:
+    import ctranslate2  # int8 T5 engine, used when models/legal_t5_summarizer_ct2 exists
+except ImportError:
+    ctranslate2 = None
+
 # CONFIGURATION
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_DIR, "models", "legal_t5_summarizer")
-
-print(f"📂 Loading T5 Summarizer from: {MODEL_PATH}")
-
-try:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-    model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH)
-    print("✅ T5 Model loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading T5 Model: {e}")
-    exit()
+# Build once with:
+#   ct2-transformers-converter --model backend/ai_service/models/legal_t5_summarizer \
+#       --output_dir backend/ai_service/models/legal_t5_summarizer_ct2 --quantization int8
+CT2_PATH = os.path.join(BASE_DIR, "models", "legal_t5_summarizer_ct2")
 
 # TEST DATA
 complex_clause = """
-In the event that the Service Provider fails to perform the Services in accordance with the specifications 
-set forth in Exhibit A, the Client shall have the right to terminate this Agreement immediately upon written notice, 
-without prejudice to any other rights or remedies available at law or in equity, and the Service Provider shall 
+In the event that the Service Provider fails to perform the Services in accordance with the specifications
+set forth in Exhibit A, the Client shall have the right to terminate this Agreement immediately upon written notice,
+without prejudice to any other rights or remedies available at law or in equity, and the Service Provider shall
 refund any and all fees paid by the Client for such non-conforming Services.
 """
 
-print("\n📜 Original Text:")
-print(complex_clause.strip())
 
-# GENERATE SUMMARY
-print("\n🤖 Generating Summary...")
-inputs = tokenizer.encode("summarize: " + complex_clause, return_tensors="pt", max_length=512, truncation=True)
-outputs = model.generate(inputs, max_length=150, min_length=40, length_penalty=2.0, num_beams=4, early_stopping=True)
-summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
+def load_summarizer():
+    """Load T5 once: CTranslate2 int8 when converted, else HF (fp16 on CUDA). Returns (tokenizer, model, translator, device)."""
+    print(f"📂 Loading T5 Summarizer from: {MODEL_PATH}")
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if ctranslate2 is not None and os.path.isdir(CT2_PATH):
+        translator = ctranslate2.Translator(CT2_PATH, device=device, compute_type="int8_float16" if device == "cuda" else "int8")
+        model = None
+        print(f"✅ CTranslate2 int8 T5 loaded from {CT2_PATH} on {device}!")
+    else:
+        translator = None
+        model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH)
+        model.to(device).eval()
+        if device == "cuda": model.half()  # T5 decode is bandwidth-bound per step
+        print(f"✅ T5 Model loaded successfully on {device}!")
+    return tokenizer, model, translator, device
+
+
+def check_summarizer(tokenizer, model, translator, device, text=complex_clause):
+    print("\n📜 Original Text:")
+    print(text.strip())
+
+    # GENERATE SUMMARY
+    print("\n🤖 Generating Summary...")
+    if translator is not None:
+        source = tokenizer.convert_ids_to_tokens(tokenizer.encode("summarize: " + text, max_length=512, truncation=True))
+        result = translator.translate_batch([source], max_decoding_length=150, min_decoding_length=40, length_penalty=2.0, beam_size=4)[0]
+        summary = tokenizer.decode(tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True)
+    else:
+        inputs = tokenizer.encode("summarize: " + text, return_tensors="pt", max_length=512, truncation=True).to(device)
+        with torch.inference_mode():
+            outputs = model.generate(inputs, max_length=150, min_length=40, length_penalty=2.0, num_beams=4, early_stopping=True)
+        summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+    print(f"\n✨ AI Summary:\n{summary}")
+    return summary
+
 
-print(f"\n✨ AI Summary:\n{summary}")
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        tokenizer, model, translator, device = load_summarizer()
+    except Exception as e:
+        print(f"❌ Error loading T5 Model: {e}")
+        exit()
+    check_summarizer(tokenizer, model, translator, device)
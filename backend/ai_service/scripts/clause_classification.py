@@ -1,76 +1,120 @@
 import psycopg2
-import pandas as pd
-from datasets import Dataset
-from transformers import BertTokenizer, BertForSequenceClassification, Trainer, TrainingArguments
-from sklearn.model_selection import train_test_split
+from datasets import ClassLabel, Dataset, Features, Value
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, DataCollatorWithPadding, Trainer, TrainingArguments
 import torch
 import os
 
 # --------------------------
 # 1️⃣ PostgreSQL connection
 # --------------------------
-conn = psycopg2.connect(
+DB_CONFIG = dict(
     dbname="lexshaksham_db",
     user="postgres",          # Replace with your DB username
     password="root",  # Replace with your DB password
     host="localhost",          # Change if using remote DB
     port="5432"
 )
+FETCH_ROWS = 10000  # rows per server-side cursor round trip
+
+conn = psycopg2.connect(**DB_CONFIG)
+
+# Map clause_type to numeric labels (one small DISTINCT query instead of scanning every row in Python)
+with conn.cursor() as cur:
+    cur.execute("SELECT DISTINCT clause_type FROM clauses WHERE clause_type IS NOT NULL ORDER BY clause_type;")
+    label_names = [row[0] for row in cur.fetchall()]
+    # datasets caches from_generator output by its arguments, so the snapshot must change whenever the
+    # training rows do: added/removed rows and in-place relabels/edits (merge_fixed_labels & co.)
+    cur.execute("""
+        SELECT COUNT(*), MAX(clause_id),
+               md5(string_agg(clause_id::text || ':' || clause_type || ':' || md5(coalesce(clause_text, '')), ',' ORDER BY clause_id))
+        FROM clauses WHERE clause_type IS NOT NULL;
+    """)
+    snapshot = tuple(str(v) for v in cur.fetchone())
+conn.close()
+
+if not label_names:
+    raise ValueError("No labeled clauses found in clause_type column for training.")
+
+labels = {label: idx for idx, label in enumerate(label_names)}
 
 # Fetch clauses with labels
 query = "SELECT clause_id, clause_text, clause_type FROM clauses WHERE clause_type IS NOT NULL;"
-df = pd.read_sql(query, conn)
-
-if df.empty:
-    raise ValueError("No labeled clauses found in clause_type column for training.")
 
-# Map clause_type to numeric labels
-labels = {label: idx for idx, label in enumerate(df['clause_type'].unique())}
-df['label'] = df['clause_type'].map(labels)
+def iter_clauses(query, labels, snapshot):
+    """Streams rows through a named (server-side) cursor so the table never sits in memory at once."""
+    stream_conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with stream_conn.cursor(name="clauses_cur") as cur:
+            cur.itersize = FETCH_ROWS
+            cur.execute(query)
+            unknown = {}  # clause types inserted after the DISTINCT query above
+            for _, text, clause_type in cur:
+                label = labels.get(clause_type)
+                if label is None:
+                    unknown[clause_type] = unknown.get(clause_type, 0) + 1
+                    continue
+                yield {'text': text, 'label': label}
+            if unknown:
+                print(f"⚠️ Skipped rows with clause types added during the build: {unknown}")
+    finally:
+        stream_conn.close()
+
+# Rows are written straight to Arrow; ClassLabel lets datasets stratify the split
+features = Features({'text': Value('string'), 'label': ClassLabel(names=label_names)})
+dataset = Dataset.from_generator(iter_clauses, gen_kwargs={'query': query, 'labels': labels, 'snapshot': snapshot}, features=features)
 
 # --------------------------
 # 2️⃣ Split dataset
 # --------------------------
-train_texts, val_texts, train_labels, val_labels = train_test_split(
-    df['clause_text'].tolist(),
-    df['label'].tolist(),
-    test_size=0.1,
-    random_state=42
-)
-
-train_dataset = Dataset.from_dict({'text': train_texts, 'label': train_labels})
-val_dataset = Dataset.from_dict({'text': val_texts, 'label': val_labels})
+try:
+    split = dataset.train_test_split(test_size=0.1, seed=42, stratify_by_column='label')
+except ValueError as e:
+    # Stratifying needs at least 2 rows per class (and a test split with room for every class)
+    print(f"⚠️ Stratified split not possible ({e}); falling back to a random split.")
+    split = dataset.train_test_split(test_size=0.1, seed=42)
+train_dataset, val_dataset = split['train'], split['test']
 
 # --------------------------
 # 3️⃣ Tokenization
 # --------------------------
-tokenizer = BertTokenizer.from_pretrained('nlpaueb/legal-bert-base-uncased')
+# Fast (Rust) tokenizer: batched calls are already spread across cores, so no num_proc workers
+tokenizer = AutoTokenizer.from_pretrained('nlpaueb/legal-bert-base-uncased', use_fast=True)
 
 def tokenize(batch):
-    return tokenizer(batch['text'], padding=True, truncation=True, max_length=512)
+    # No padding here: the collator pads each training batch to its own longest clause
+    return tokenizer(batch['text'], truncation=True, max_length=512)
 
-train_dataset = train_dataset.map(tokenize, batched=True)
-val_dataset = val_dataset.map(tokenize, batched=True)
+train_dataset = train_dataset.map(tokenize, batched=True, batch_size=1000, remove_columns=['text'])
+val_dataset = val_dataset.map(tokenize, batched=True, batch_size=1000, remove_columns=['text'])
 
-train_dataset.set_format(type='torch', columns=['input_ids', 'attention_mask', 'label'])
-val_dataset.set_format(type='torch', columns=['input_ids', 'attention_mask', 'label'])
+data_collator = DataCollatorWithPadding(tokenizer=tokenizer)
 
 # --------------------------
 # 4️⃣ Model Initialization
 # --------------------------
 num_labels = len(labels)
-model = BertForSequenceClassification.from_pretrained('nlpaueb/legal-bert-base-uncased', num_labels=num_labels)
+model = AutoModelForSequenceClassification.from_pretrained('nlpaueb/legal-bert-base-uncased', num_labels=num_labels)
 
 # --------------------------
 # 5️⃣ Training Arguments
 # --------------------------
 output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../models/legalbert_clause')
 
+# bf16/TF32 need Ampere+; fused AdamW and torch.compile need CUDA. CPU runs keep the fp32 defaults.
+use_cuda = torch.cuda.is_available()
+use_bf16 = use_cuda and torch.cuda.is_bf16_supported()
+
 training_args = TrainingArguments(
     output_dir=output_dir,
     num_train_epochs=3,
-    per_device_train_batch_size=8,
-    per_device_eval_batch_size=8,
+    per_device_train_batch_size=32,   # fits with gradient checkpointing
+    gradient_accumulation_steps=2,
+    per_device_eval_batch_size=32,
+    gradient_checkpointing=True,
+    bf16=use_bf16,
+    tf32=use_bf16,
+    torch_compile=use_cuda,
+    optim="adamw_torch_fused" if use_cuda else "adamw_torch",
     evaluation_strategy="epoch",       # correct for 4.56.2
     save_strategy="epoch",
     logging_dir=os.path.join(output_dir, '../logs'),
@@ -98,6 +142,7 @@ trainer = Trainer(
     args=training_args,
     train_dataset=train_dataset,
     eval_dataset=val_dataset,
+    data_collator=data_collator,
     compute_metrics=compute_metrics
 )
 
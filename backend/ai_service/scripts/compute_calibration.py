@@ -17,21 +17,39 @@ from sklearn.calibration import calibration_curve
 RESULTS_DIR = Path(__file__).resolve().parents[1] / "results"
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+CHUNK_ROWS = 65536  # rows of logits scaled/exponentiated at a time
+
 def compute_ece(probabilities, labels, n_bins=10):
-    bin_edges = np.linspace(0, 1, n_bins + 1)
-    bin_lowers = bin_edges[:-1]
-    bin_uppers = bin_edges[1:]
+    """ECE over equal-width (lower, upper] confidence bins, one bincount pass per statistic."""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    n = len(probabilities)
+    if n == 0:
+        return 0.0
+
+    # Uniform bins need no search: p in (i/n, (i+1)/n] -> ceil(p * n) - 1. p == 0 falls outside every bin, as before
+    in_range = (probabilities > 0) & (probabilities <= 1)
+    probs_in = probabilities[in_range]
+    bin_idx = np.clip(np.ceil(probs_in * n_bins).astype(np.int64) - 1, 0, n_bins - 1)
+
+    conf_sum = np.bincount(bin_idx, weights=probs_in, minlength=n_bins)
+    acc_sum = np.bincount(bin_idx, weights=labels[in_range], minlength=n_bins)
+
+    # sum_b |conf_b - acc_b| * count_b / n  ==  sum_b |conf_sum_b - acc_sum_b| / n
+    return float(np.sum(np.abs(conf_sum - acc_sum)) / n)
 
-    ece = 0.0
-    for bin_lower, bin_upper in zip(bin_lowers, bin_uppers):
-        in_bin = (probabilities > bin_lower) & (probabilities <= bin_upper)
-        prop_in_bin = np.mean(in_bin)
-        if prop_in_bin > 0:
-            avg_confidence = np.mean(probabilities[in_bin])
-            avg_accuracy = np.mean(labels[in_bin])
-            ece += np.abs(avg_confidence - avg_accuracy) * prop_in_bin
+def true_class_probabilities(logits, labels, temperature, chunk_rows=CHUNK_ROWS):
+    """softmax(logits / T)[i, labels[i]] for every row, one stable row-chunk at a time.
 
-    return ece
+    Working memory is chunk_rows x C instead of N x C, so memory-mapped logits stay mostly on disk.
+    """
+    out = np.empty(len(labels), dtype=np.float64)
+    for start in range(0, len(labels), chunk_rows):
+        z = np.asarray(logits[start:start + chunk_rows], dtype=np.float64) / temperature
+        z -= z.max(axis=1, keepdims=True)
+        true_z = z[np.arange(len(z)), labels[start:start + chunk_rows]]
+        out[start:start + len(z)] = np.exp(true_z) / np.exp(z).sum(axis=1)
+    return out
 
 def main():
     parser = argparse.ArgumentParser()
@@ -40,7 +58,7 @@ def main():
     parser.add_argument("--temperature", type=float, default=1.0, help="Temperature scaling factor")
     args = parser.parse_args()
 
-    logits = np.load(args.logits)
+    logits = np.load(args.logits, mmap_mode="r")
     labels = np.load(args.labels)
 
     # Reshape logits if needed (remove extra dimensions)
@@ -48,17 +66,13 @@ def main():
         logits = logits.reshape(logits.shape[0], -1)
 
     # Map string labels to integers
-    unique_labels = np.unique(labels)
-    label_to_index = {label: idx for idx, label in enumerate(unique_labels)}
-    labels = np.array([label_to_index[label] for label in labels], dtype=int)
+    unique_labels, labels = np.unique(labels, return_inverse=True)
 
-    # Apply temperature scaling
-    scaled_logits = logits / args.temperature
-    probabilities = np.exp(scaled_logits) / np.sum(np.exp(scaled_logits), axis=1, keepdims=True)
-    predicted_labels = np.argmax(probabilities, axis=1)
+    # argmax(logits / T) == argmax(logits) for T > 0, so predictions need no softmax
+    predicted_labels = np.argmax(logits, axis=1)
 
-    # Compute ECE using true class probabilities
-    true_class_probs = probabilities[np.arange(len(labels)), labels]
+    # Compute ECE using true class probabilities (temperature-scaled, never the full N x C softmax)
+    true_class_probs = true_class_probabilities(logits, labels, args.temperature)
     ece = compute_ece(true_class_probs, (predicted_labels == labels).astype(int))
 
     results = {
@@ -1,9 +1,12 @@
 import os
 import json
+import re
+from collections import Counter
 import numpy as np
-from sklearn.utils.class_weight import compute_class_weight
 from pathlib import Path
 
+from _jsonl import loads
+
 # IMPORTANT: use the *integer-labeled* dataset
 train_file = "backend/ai_service/datasets/clause_dataset/prepared/train_int.jsonl"
 
@@ -12,28 +15,32 @@ if not Path(train_file).exists():
 
 print("✔ Using train file:", train_file)
 
-# Load numeric labels
-labels = []
-with open(train_file, "r", encoding="utf-8") as f:
-    for line in f:
-        obj = json.loads(line)
-        label = obj["label"]
+# Only the integer "label" field is needed: pull it out of the raw bytes and fall back
+# to a full JSON parse (with the string-label check) for any line the pattern misses
+LABEL_RE = re.compile(rb'"label"\s*:\s*(-?\d+)\s*[,}]')
 
-        # ensure numeric
-        if isinstance(label, str):
-            raise ValueError(f"❌ Found string label in {train_file}. Something is wrong: {label}")
+def parse_label(line):
+    label = loads(line)["label"]
 
-        labels.append(label)
+    # ensure numeric
+    if isinstance(label, str):
+        raise ValueError(f"❌ Found string label in {train_file}. Something is wrong: {label}")
+    return label
+
+# Count numeric labels while streaming (balanced weights only need per-class counts)
+counts = Counter()
+with open(train_file, "rb") as f:
+    for line in f:
+        if not line.strip():
+            continue
+        m = LABEL_RE.search(line)
+        counts[int(m.group(1)) if m else parse_label(line)] += 1
 
-labels = np.array(labels)
-classes = np.unique(labels)
+classes = np.array(sorted(counts))
+freqs = np.array([counts[c] for c in classes], dtype=np.float64)
 
-# Compute balanced weights
-weights = compute_class_weight(
-    class_weight="balanced",
-    classes=classes,
-    y=labels
-)
+# Compute balanced weights: n_samples / (n_classes * count_c), same as sklearn's "balanced"
+weights = freqs.sum() / (len(classes) * freqs)
 
 # Convert to int->float mapping
 weights_out = {int(c): float(w) for c, w in zip(classes, weights)}
@@ -0,0 +1,94 @@
+"""
+Convert Judgment Metadata JSON to Memory-Mapped Columns
+-------------------------------------------------------
+judgments_meta.json is a list of {"judgment_id", "case_name", "year", "text"}
+records aligned with the rows of judgments.index. app.py keeps that whole list
+in the Python heap. This script writes one flat binary file per column so the
+app can np.memmap them and decode only the top_k rows a query returns.
+
+Output directory: backend/ai_service/indexes/judgments_meta/
+    ids.i64              int64   judgment_id per row
+    years.i32            int32   year per row (0 when missing)
+    case_names.u8        uint8   case_name, UTF-8, fixed 128 bytes per row (NUL padded,
+                                 longer names cut on a character boundary)
+    snippets.u8          uint8   all text snippets, UTF-8, concatenated
+    snippet_offsets.i64  int64   N + 1 byte offsets into snippets.u8
+
+Usage:
+    python backend/ai_service/scripts/convert_faiss_meta.py
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+BASE_AI = Path(__file__).resolve().parents[1]
+INDEX_DIR = BASE_AI / "indexes"
+META_JSON = INDEX_DIR / "judgments_meta.json"
+META_DIR = INDEX_DIR / "judgments_meta"
+
+CASE_NAME_BYTES = 128
+
+
+def _to_int(value, field: str, row: int, missing=None) -> int:
+    """int(value); missing (None / "") maps to `missing` when given, anything non-integer raises."""
+    if missing is not None and (value is None or value == ""):
+        return missing
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"row {row}: {field} {value!r} is not an integer") from None
+
+
+def _case_name_bytes(name: str, row: int) -> bytes:
+    raw = name.encode("utf-8")
+    if len(raw) <= CASE_NAME_BYTES:
+        return raw
+    # Drop a multi-byte character split by the cut instead of storing half of it
+    cut = raw[:CASE_NAME_BYTES].decode("utf-8", "ignore").encode("utf-8")
+    print(f"⚠️ row {row}: case_name truncated from {len(raw)} to {len(cut)} bytes: {name[:60]!r}")
+    return cut
+
+
+def convert(records, out_dir: Path) -> None:
+    n = len(records)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ids = np.array([_to_int(r.get("judgment_id"), "judgment_id", i) for i, r in enumerate(records)], dtype=np.int64)
+    years = np.array([_to_int(r.get("year"), "year", i, missing=0) for i, r in enumerate(records)], dtype=np.int32)
+
+    case_names = np.zeros((n, CASE_NAME_BYTES), dtype=np.uint8)
+    for i, r in enumerate(records):
+        raw = _case_name_bytes(str(r.get("case_name", "")), i)
+        case_names[i, :len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    with open(out_dir / "snippets.u8", "wb") as f:
+        for i, r in enumerate(records):
+            raw = str(r.get("text", "")).encode("utf-8")
+            f.write(raw)
+            offsets[i + 1] = offsets[i] + len(raw)
+
+    ids.tofile(out_dir / "ids.i64")
+    years.tofile(out_dir / "years.i32")
+    case_names.tofile(out_dir / "case_names.u8")
+    offsets.tofile(out_dir / "snippet_offsets.i64")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--meta", type=str, default=str(META_JSON), help="judgments_meta.json to convert")
+    parser.add_argument("--out", type=str, default=str(META_DIR), help="Output directory for column files")
+    args = parser.parse_args()
+
+    with open(args.meta, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    convert(records, Path(args.out))
+    print(f"✅ Wrote {len(records)} metadata rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
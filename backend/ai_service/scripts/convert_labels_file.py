@@ -9,6 +9,10 @@ import json
 import argparse
 from pathlib import Path
 
+from _jsonl import loads, dumps_line
+
+WRITE_CHUNK_BYTES = 1 << 20  # flush encoded JSONL to disk in ~1 MiB writes
+
 def load_map(map_path):
     m = json.load(open(map_path, "r", encoding="utf-8"))
     # map keys may be either normalized keys or aliases -> ints.
@@ -19,15 +23,13 @@ def load_map(map_path):
         norm[norm_key] = v
     return norm
 
+# " ", "-", "/" -> "_" and drop "." in one str.translate pass
+_NORM_TABLE = str.maketrans({" ": "_", "-": "_", "/": "_", ".": None})
+
 def normalize_label_key(s):
     if s is None:
         return s
-    s2 = str(s).strip().lower()
-    s2 = s2.replace(" ", "_")
-    s2 = s2.replace("-", "_")
-    s2 = s2.replace("/", "_")
-    s2 = s2.replace(".", "")
-    return s2
+    return str(s).strip().lower().translate(_NORM_TABLE)
 
 def safe_int(s):
     try:
@@ -35,6 +37,25 @@ def safe_int(s):
     except:
         return None
 
+def resolve_label(lab, mapd):
+    """Map one raw label to (int, unmapped_key). unmapped_key is set when only the digit fallback matched."""
+    # if already int (or string of digits), keep int
+    lab_int = safe_int(lab)
+    if lab_int is not None:
+        return lab_int, None
+    k = normalize_label_key(lab)
+    mapped = mapd.get(k)
+    if mapped is None:
+        # try direct lookup without normalization
+        mapped = mapd.get(str(lab).strip().lower())
+    if mapped is not None:
+        return int(mapped), None
+    # fallback: if label is numeric string with stray chars, try to extract digits
+    digits = "".join(ch for ch in str(lab) if ch.isdigit())
+    if digits:
+        return int(digits), k
+    raise ValueError(f"Could not map label '{lab}'. Add alias to normalized map and re-run. Example unmapped: {k}")
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--in", dest="infile", required=True)
@@ -49,33 +70,27 @@ def main():
     assert inf.exists(), f"infile not found: {inf}"
     count = 0
     unmapped = {}
-    with open(inf, "r", encoding="utf-8") as fin, open(outf, "w", encoding="utf-8") as fo:
+    label_cache = {}  # raw label -> (int label, unmapped key or None)
+    with open(inf, "rb") as fin, open(outf, "wb", buffering=WRITE_CHUNK_BYTES) as fo:
+        buf = bytearray()
         for line in fin:
             if not line.strip():
                 continue
-            obj = json.loads(line)
+            obj = loads(line)
             lab = obj.get("label")
-            # if already int (or string of digits), keep int
-            lab_int = safe_int(lab)
-            if lab_int is None:
-                k = normalize_label_key(lab)
-                mapped = mapd.get(k)
-                if mapped is None:
-                    # try direct lookup without normalization
-                    mapped = mapd.get(str(lab).strip().lower())
-                if mapped is None:
-                    unmapped[k] = unmapped.get(k, 0) + 1
-                    # fallback: if label is numeric string with stray chars, try to extract digits
-                    digits = "".join(ch for ch in str(lab) if ch.isdigit())
-                    if digits:
-                        lab_int = int(digits)
-                    else:
-                        raise ValueError(f"Could not map label '{lab}'. Add alias to normalized map and re-run. Example unmapped: {k}")
-                else:
-                    lab_int = int(mapped)
+            # each distinct raw label is normalized/looked up once; only the unmapped tally is per line
+            if lab not in label_cache:
+                label_cache[lab] = resolve_label(lab, mapd)
+            lab_int, unmapped_key = label_cache[lab]
+            if unmapped_key is not None:
+                unmapped[unmapped_key] = unmapped.get(unmapped_key, 0) + 1
             obj["label"] = lab_int
-            fo.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            buf += dumps_line(obj)
+            if len(buf) >= WRITE_CHUNK_BYTES:
+                fo.write(buf)
+                buf.clear()
             count += 1
+        fo.write(buf)
 
     print(f"Wrote {count} lines to {outf}")
     if unmapped:
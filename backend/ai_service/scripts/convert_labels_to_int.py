@@ -1,8 +1,17 @@
 import json
 from pathlib import Path
 
+from _jsonl import loads, dumps_line
+
 MAP_FILE = "backend/ai_service/datasets/normalized_label_map.json"
 LABEL_MAP = json.load(open(MAP_FILE))
+# Lookup on normalized keys, memoized per raw label so each distinct string is lowered/stripped once
+LABEL_MAP_LC = {k.lower().strip(): v for k, v in LABEL_MAP.items()}
+_resolved = {}  # raw label -> (id or _MISSING, normalized key)
+_MISSING = object()
+missing = {}  # normalized label -> skipped line count (reported once per label)
+
+WRITE_CHUNK_BYTES = 1 << 20  # flush encoded JSONL to disk in ~1 MiB writes
 
 files = {
     "train": "backend/ai_service/datasets/clause_dataset/prepared/train.jsonl",
@@ -13,15 +22,31 @@ for split, path in files.items():
     out_path = path.replace(".jsonl", "_int.jsonl")
     print(f"Converting {path} → {out_path}")
 
-    out = open(out_path, "w", encoding="utf-8")
-    for line in open(path, "r", encoding="utf-8"):
-        obj = json.loads(line)
-        lbl = obj["label"].lower().strip()
-        if lbl not in LABEL_MAP:
-            print("❌ Missing label in map:", lbl)
-            continue
-        obj["label"] = LABEL_MAP[lbl]
-        out.write(json.dumps(obj) + "\n")
-    out.close()
+    with open(path, "rb") as fin, open(out_path, "wb", buffering=WRITE_CHUNK_BYTES) as out:
+        buf = bytearray()
+        for line in fin:
+            if not line.strip():
+                continue
+            obj = loads(line)
+            raw = obj["label"]
+            hit = _resolved.get(raw)
+            if hit is None:
+                # first sighting of this raw label: normalize + look up once
+                key = str(raw).lower().strip()
+                hit = _resolved[raw] = (LABEL_MAP_LC.get(key, _MISSING), key)
+                if hit[0] is _MISSING:
+                    print("❌ Missing label in map:", key)
+            label_id, key = hit
+            if label_id is _MISSING:
+                missing[key] = missing.get(key, 0) + 1
+                continue
+            obj["label"] = label_id
+            buf += dumps_line(obj)
+            if len(buf) >= WRITE_CHUNK_BYTES:
+                out.write(buf)
+                buf.clear()
+        out.write(buf)
 
+if missing:
+    print("⚠️ Skipped lines with unmapped labels:", missing)
 print("✔ Conversion complete.")
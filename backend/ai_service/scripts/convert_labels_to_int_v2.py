@@ -3,6 +3,15 @@ import json
 from pathlib import Path
 from difflib import get_close_matches
 
+try:
+    from rapidfuzz import fuzz, process  # C++ Levenshtein; difflib fallback below
+except ImportError:
+    process = None
+
+from _jsonl import loads, dumps_line
+
+WRITE_CHUNK_BYTES = 1 << 20  # flush encoded JSONL to disk in ~1 MiB writes
+
 MAP_FILE = Path("backend/ai_service/datasets/normalized_label_map.json")
 assert MAP_FILE.exists(), "Normalized map missing. Run create_normalized_label_map_v2.py first."
 
@@ -12,7 +21,47 @@ LABEL_MAP = json.load(open(MAP_FILE, "r"))
 # LABEL_MAP maps label_string -> numeric id (some entries may be None if unresolved)
 # Build reverse: normalized_key -> id (already the values)
 # We'll also allow fuzzy match against LABEL_MAP keys.
-all_keys = list(LABEL_MAP.keys())
+all_keys = tuple(LABEL_MAP.keys())
+
+
+def closest_key(raw_lbl):
+    """Best LABEL_MAP key with similarity >= 0.7, or None."""
+    if process is not None:
+        match = process.extractOne(raw_lbl, all_keys, scorer=fuzz.ratio, score_cutoff=70)
+        return match[0] if match else None
+    matches = get_close_matches(raw_lbl, all_keys, n=1, cutoff=0.7)
+    return matches[0] if matches else None
+
+
+_resolved = {}  # raw label -> id (None when unmappable); each distinct label is resolved once
+
+
+def resolve_label(raw_lbl):
+    if raw_lbl in _resolved:
+        return _resolved[raw_lbl]
+    label_id = None
+
+    # direct match
+    if LABEL_MAP.get(raw_lbl) is not None:
+        label_id = LABEL_MAP[raw_lbl]
+    else:
+        # sometimes labels contain spaces or slashes
+        candidate = raw_lbl.replace(" ", "_").replace("-", "_").replace("/", "_")
+        if LABEL_MAP.get(candidate) is not None:
+            label_id = LABEL_MAP[candidate]
+        else:
+            # fuzzy match to suggest best key
+            matched = closest_key(raw_lbl)
+            if matched is not None and LABEL_MAP.get(matched) is not None:
+                label_id = LABEL_MAP[matched]
+            else:
+                # last resort: try splitting on nonalpha and check parts
+                parts = [p for p in raw_lbl.replace("/", " ").replace("-", " ").split() if p]
+                label_id = next((LABEL_MAP[p] for p in parts if LABEL_MAP.get(p) is not None), None)
+
+    _resolved[raw_lbl] = label_id
+    return label_id
+
 
 files = {
     "train": Path("backend/ai_service/datasets/clause_dataset/prepared/train.jsonl"),
@@ -24,54 +73,30 @@ for split, path in files.items():
     out_path = path.with_name(path.stem + "_int.jsonl")
     print(f"Converting {path} -> {out_path}")
     out_lines = 0
-    with open(path, "r", encoding="utf-8") as fin, open(out_path, "w", encoding="utf-8") as fout:
+    with open(path, "rb") as fin, open(out_path, "wb", buffering=WRITE_CHUNK_BYTES) as fout:
+        buf = bytearray()
         for line in fin:
-            obj = json.loads(line)
+            if not line.strip():
+                continue
+            obj = loads(line)
             raw_lbl = str(obj.get("label", "")).lower().strip()
             if raw_lbl == "":
                 unknowns.add(("empty", split))
                 continue
 
-            # direct match
-            if raw_lbl in LABEL_MAP and LABEL_MAP[raw_lbl] is not None:
-                obj["label"] = LABEL_MAP[raw_lbl]
-                fout.write(json.dumps(obj) + "\n")
-                out_lines += 1
-                continue
-
-            # sometimes labels contain spaces or slashes
-            candidate = raw_lbl.replace(" ", "_").replace("-", "_").replace("/", "_")
-            if candidate in LABEL_MAP and LABEL_MAP[candidate] is not None:
-                obj["label"] = LABEL_MAP[candidate]
-                fout.write(json.dumps(obj) + "\n")
+            label_id = resolve_label(raw_lbl)
+            if label_id is not None:
+                obj["label"] = label_id
+                buf += dumps_line(obj)
+                if len(buf) >= WRITE_CHUNK_BYTES:
+                    fout.write(buf)
+                    buf.clear()
                 out_lines += 1
                 continue
 
-            # fuzzy match to suggest best key
-            matches = get_close_matches(raw_lbl, all_keys, n=1, cutoff=0.7)
-            if matches:
-                matched = matches[0]
-                if LABEL_MAP.get(matched) is not None:
-                    obj["label"] = LABEL_MAP[matched]
-                    fout.write(json.dumps(obj) + "\n")
-                    out_lines += 1
-                    continue
-
-            # last resort: try splitting on nonalpha and check parts
-            parts = [p for p in raw_lbl.replace("/", " ").replace("-", " ").split() if p]
-            mapped = False
-            for p in parts:
-                if p in LABEL_MAP and LABEL_MAP[p] is not None:
-                    obj["label"] = LABEL_MAP[p]
-                    fout.write(json.dumps(obj) + "\n")
-                    out_lines += 1
-                    mapped = True
-                    break
-            if mapped:
-                continue
-
             # could not map
             unknowns.add((raw_lbl, split))
+        fout.write(buf)
 
     print(f" -> wrote {out_lines} lines to {out_path}")
 
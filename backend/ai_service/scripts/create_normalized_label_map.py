@@ -29,11 +29,14 @@ orig_map = {
   "Warranties and Representations": 24
 }
 
+# " " -> "_", drop "/", "(", ")", "-" (one translate pass per key)
+_KEY_TABLE = str.maketrans({" ": "_", "/": None, "(": None, ")": None, "-": None})
+
 # normalize both sides
 normalized = {}
 
 for k, v in orig_map.items():
-    key = k.lower().replace(" ", "_").replace("/", "").replace("(", "").replace(")", "").replace("-", "")
+    key = k.lower().translate(_KEY_TABLE)
     # remove double underscores
     key = key.replace("__", "_")
     normalized[key] = v
@@ -1,5 +1,6 @@
 # backend/ai_service/scripts/create_normalized_label_map_v2.py
 import json
+import re
 from pathlib import Path
 
 # Official human-readable label → numeric ID
@@ -31,12 +32,13 @@ orig_map = {
   "Warranties and Representations": 24
 }
 
+# "/", "(", ")", "-" become spaces in one translate pass; whitespace runs then collapse to "_"
+_SEP_TABLE = str.maketrans({"/": " ", "(": " ", ")": " ", "-": " "})
+_WS = re.compile(r"\s+")
+
 def normalize_key(label: str):
     """Normalize a label into a lowercase snake-case key."""
-    x = label.lower().strip()
-    x = x.replace("/", " ").replace("(", " ").replace(")", " ").replace("-", " ")
-    x = "_".join(x.split())
-    return x
+    return _WS.sub("_", label.lower().translate(_SEP_TABLE).strip())
 
 # Step 1 — Build normalized canonical map from orig_map
 base_normalized = {normalize_key(k): v for k, v in orig_map.items()}
@@ -119,14 +121,10 @@ aliases = {
 }
 
 # Step 3 — Resolve aliases to numeric IDs
-final_map = dict(base_normalized)  # start from canonical
-
-for alias, target in aliases.items():
-    if target in base_normalized:
-        final_map[alias] = base_normalized[target]
-    else:
-        # Should not happen; if it does, leave unmapped so we can catch it
-        final_map[alias] = None
+# The alias table is static: catch stale targets once here instead of writing None entries
+stale = set(aliases.values()) - set(base_normalized)
+assert not stale, f"Alias targets missing from orig_map: {sorted(stale)}"
+final_map = {**base_normalized, **{alias: base_normalized[target] for alias, target in aliases.items()}}
 
 # Step 4 — Write to file
 out_path = Path("backend/ai_service/datasets/normalized_label_map.json")
@@ -1,7 +1,6 @@
 # backend/ai_service/scripts/debug_eval_preds.py
 import numpy as np, json
 from pathlib import Path
-from collections import Counter
 
 ROOT = Path(__file__).resolve().parents[2]
 logits_path = ROOT / "results" / "logits.npy"
@@ -12,32 +11,37 @@ if not logits_path.exists() or not labels_path.exists():
     print("Missing logits.npy or labels.npy at backend/ai_service/results/")
     raise SystemExit(1)
 
-logits = np.load(logits_path)
-labels = np.load(labels_path)
+# memory-map: only argmax/bincount passes read them
+logits = np.load(logits_path, mmap_mode="r")
+labels = np.load(labels_path, mmap_mode="r")
 
 print("Logits shape:", logits.shape)
 print("Labels shape:", labels.shape)
 preds = logits.argmax(axis=1)
-print("Unique ground-truth labels:", sorted(list(set(labels.tolist())))[:20])
-print("Unique predicted labels (top 20 counts):", Counter(preds.tolist()).most_common(20))
+labels = labels.astype(np.int64, copy=False)
+
+def most_common(counts, k):
+    """(index, count) pairs for the k largest non-zero bincount entries, like Counter.most_common."""
+    top = np.argsort(-counts, kind="stable")[:k]
+    top = top[counts[top] > 0]
+    return list(zip(top.tolist(), counts[top].tolist()))
+
+pred_counts = np.bincount(preds)
+label_counts = np.bincount(labels)
+print("Unique ground-truth labels:", np.unique(labels)[:20].tolist())
+print("Unique predicted labels (top 20 counts):", most_common(pred_counts, 20))
 # show top 10 most-predicted indices and their counts
-print("Most predicted indices:", Counter(preds.tolist()).most_common(10))
+print("Most predicted indices:", most_common(pred_counts, 10))
 
 # Print mismatch examples (first 20)
-mismatch_count = 0
-for i in range(min(len(preds), 200)):
-    if preds[i] != labels[i]:
-        mismatch_count += 1
-        if mismatch_count <= 20:
-            print(f"idx {i}: true={int(labels[i])}, pred={int(preds[i])}")
-print("Total mismatches in shown slice:", mismatch_count)
+n_shown = min(len(preds), 200)
+mismatch_idx = np.flatnonzero(preds[:n_shown] != labels[:n_shown])
+for i in mismatch_idx[:20].tolist():
+    print(f"idx {i}: true={int(labels[i])}, pred={int(preds[i])}")
+print("Total mismatches in shown slice:", len(mismatch_idx))
 
 # Compare distribution
-from collections import defaultdict
-dist = defaultdict(int)
-for l in labels:
-    dist[int(l)] += 1
-print("Ground-truth distribution (sample):", sorted(dist.items(), key=lambda x:-x[1])[:10])
+print("Ground-truth distribution (sample):", most_common(label_counts, 10))
 
 # check label mapping file if present
 label_map_file = model_dir / "label_classes.json"
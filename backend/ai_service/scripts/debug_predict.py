@@ -13,6 +13,7 @@ model = AutoModelForSequenceClassification.from_pretrained(str(MODEL_DIR))
 model.eval()
 device = "cuda" if torch.cuda.is_available() else "cpu"
 model.to(device)
+if device == "cuda": model.half()
 
 print("Device:", device)
 print("Num labels (model.config.num_labels):", getattr(model.config, "num_labels", None))
@@ -24,23 +25,28 @@ examples = [
     "The supplier will not be liable for delay caused by force majeure.",
 ]
 
-for s in examples:
-    enc = tokenizer(s, return_tensors="pt", truncation=True, padding=True, max_length=256).to(device)
-    with torch.no_grad():
-        out = model(**enc)
-    logits = out.logits
-    probs = torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()[0]
-    pred_idx = int(probs.argmax())
-    top5 = sorted(list(enumerate(probs)), key=lambda x: -x[1])[:5]
+# --- FIXED: read label_classes.json and index using str(pred_idx) if keys are strings ---
+label_map_file = MODEL_DIR / "label_classes.json"
+labels = json.load(open(label_map_file, "r", encoding="utf8")) if label_map_file.exists() else None
+
+# One padded forward for all examples; softmax/topk in float32, then only printing per example
+enc = tokenizer(examples, return_tensors="pt", truncation=True, padding=True, max_length=256).to(device)
+with torch.inference_mode():
+    logits = model(**enc).logits.float()
+    probs = torch.softmax(logits, dim=-1)
+    # topk selects the 5 best without sorting every class; argmax reads the logits directly
+    top_p, top_i = torch.topk(probs, k=min(5, probs.shape[-1]), dim=-1)
+    pred_ids = logits.argmax(dim=-1)
+top_p, top_i, pred_ids = top_p.cpu().tolist(), top_i.cpu().tolist(), pred_ids.cpu().tolist()
+
+for s, row_p, row_i, pred_idx in zip(examples, top_p, top_i, pred_ids):
+    top5 = list(zip(row_i, row_p))
     print("\nTEXT:", s)
-    print("LOGITS shape:", tuple(logits.shape))
+    print("LOGITS shape:", (1, logits.shape[-1]))
     print("Top5 (idx,prob):", top5)
     print("Predicted idx:", pred_idx)
 
-    # --- FIXED: read label_classes.json and index using str(pred_idx) if keys are strings ---
-    label_map_file = MODEL_DIR / "label_classes.json"
-    if label_map_file.exists():
-        labels = json.load(open(label_map_file, "r", encoding="utf8"))
+    if labels is not None:
         human = labels.get(str(pred_idx)) or labels.get(pred_idx) or "N/A"
         print("Mapped label_classes.json ->", human)
     else:
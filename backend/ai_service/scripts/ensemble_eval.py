@@ -7,19 +7,27 @@ parser.add_argument("--outdir", default="backend/ai_service/results/ensemble")
 args=parser.parse_args()
 out = Path(args.outdir); out.mkdir(parents=True, exist_ok=True)
 
-logits_list=[]
+# running sum: one model's logits in memory at a time instead of a stacked (K, N, C) array
+acc=None
+out_dtype=None
 labels=None
 for d in args.logit_dirs:
     lfile = Path(d)/"logits.npy"
     la = Path(d)/"labels.npy"
     assert lfile.exists(), lfile
-    logits_list.append(np.load(lfile))
+    arr = np.load(lfile)
+    if acc is None:
+        acc = np.zeros(arr.shape, dtype=np.float64)
+        out_dtype = arr.dtype
+    np.add(acc, arr, out=acc)
+    del arr
     if labels is None:
         labels = np.load(la)
     else:
         assert np.array_equal(labels, np.load(la))
 # average
-avg = np.mean(np.stack(logits_list,axis=0), axis=0)
+acc /= len(args.logit_dirs)
+avg = acc.astype(out_dtype, copy=False)
 np.save(out/"logits.npy", avg)
 np.save(out/"labels.npy", labels)
 print("Saved ensemble logits and labels to", out)
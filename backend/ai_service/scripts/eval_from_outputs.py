@@ -4,8 +4,9 @@ from pathlib import Path
 from sklearn.metrics import classification_report, accuracy_score
 
 resdir = Path("backend/ai_service/results")
-logits = np.load(resdir/"logits.npy")
-labels = np.load(resdir/"labels.npy")
+# memory-map: argmax is one pass over logits, so pages stream in instead of loading the whole matrix
+logits = np.load(resdir/"logits.npy", mmap_mode="r")
+labels = np.load(resdir/"labels.npy", mmap_mode="r")
 preds = logits.argmax(axis=1)
 
 print("Accuracy:", accuracy_score(labels, preds))
@@ -1,9 +1,7 @@
 # backend/ai_service/scripts/eval_from_outputs_robust.py
 import numpy as np, json, argparse
 from pathlib import Path
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
 import matplotlib.pyplot as plt
-import seaborn as sns
 
 # NEW: Add argument parsing to choose the folder
 parser = argparse.ArgumentParser()
@@ -19,8 +17,15 @@ labels_path = resdir/"labels.npy"
 if not logits_path.exists() or not labels_path.exists():
     raise SystemExit(f"Error: Could not find logits.npy or labels.npy in {resdir}")
 
-logits = np.load(logits_path, allow_pickle=True)
-labels = np.load(labels_path, allow_pickle=True)
+def load_array(path):
+    """Memory-map numeric .npy files (pages stream in during argmax); object arrays still need a pickled load."""
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        return np.load(path, allow_pickle=True)
+
+logits = load_array(logits_path)
+labels = load_array(labels_path)
 
 print("Raw logits shape:", logits.shape, "raw labels shape:", labels.shape)
 
@@ -40,21 +45,61 @@ print("Preds / labels length:", len(preds), len(labels))
 if len(preds) != len(labels):
     raise SystemExit("Length mismatch between preds and labels")
 
-acc = accuracy_score(labels, preds)
+# One histogram over (true, pred) pairs; rows/cols are the sorted observed classes, as in sklearn
+classes = np.union1d(labels, preds)
+K = len(classes)
+true_idx = np.searchsorted(classes, labels).astype(np.int64)
+pred_idx = np.searchsorted(classes, preds).astype(np.int64)
+cm = np.bincount(true_idx * K + pred_idx, minlength=K * K).reshape(K, K)
+
+def report_from_confusion(cm, classes):
+    """classification_report(output_dict=True, zero_division=0) computed from the confusion matrix."""
+    tp = np.diag(cm).astype(np.float64)
+    pred_total = cm.sum(axis=0)
+    support = cm.sum(axis=1)
+    precision = tp / np.maximum(pred_total, 1)
+    recall = tp / np.maximum(support, 1)
+    f1 = np.where(precision + recall > 0, 2 * precision * recall / np.maximum(precision + recall, 1e-12), 0.0)
+
+    report = {
+        str(c): {"precision": float(p), "recall": float(r), "f1-score": float(f), "support": int(n)}
+        for c, p, r, f, n in zip(classes.tolist(), precision, recall, f1, support)
+    }
+    n_total = int(support.sum())
+    report["accuracy"] = float(tp.sum() / max(n_total, 1))
+    weights = support / max(n_total, 1)
+    report["macro avg"] = {"precision": float(precision.mean()), "recall": float(recall.mean()), "f1-score": float(f1.mean()), "support": n_total}
+    report["weighted avg"] = {"precision": float(precision @ weights), "recall": float(recall @ weights), "f1-score": float(f1 @ weights), "support": n_total}
+    return report
+
+report = report_from_confusion(cm, classes)
+acc = report["accuracy"]
 print(f"Accuracy: {acc:.4f}")
 
-report = classification_report(labels, preds, zero_division=0, output_dict=True)
 with open(resdir/"classifier_metrics_from_outputs.json","w",encoding="utf8") as f:
     json.dump(report, f, indent=2)
 print("Wrote classifier_metrics_from_outputs.json")
 
 # Produce confusion matrix plot (optional)
-cm = confusion_matrix(labels, preds)
-plt.figure(figsize=(10,8))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-plt.title("Confusion Matrix")
-plt.xlabel("Predicted")
-plt.ylabel("True")
-plt.tight_layout()
-plt.savefig(resdir/"confusion_matrix.png")
-print("Saved confusion_matrix.png")
\ No newline at end of file
+# Exact counts for reviewers; the PNG below is only a visual aid
+np.savetxt(resdir/"confusion_matrix.csv", cm, fmt="%d", delimiter=",")
+print("Saved confusion_matrix.csv")
+
+# imshow + text only on non-zero cells (one seaborn Text artist per cell dominated the render time)
+fig, ax = plt.subplots(figsize=(10,8))
+im = ax.imshow(cm, cmap='Blues')
+fig.colorbar(im, ax=ax)
+threshold = cm.max() / 2 if cm.size else 0
+for i, j in np.argwhere(cm > 0):
+    ax.text(j, i, int(cm[i, j]), ha='center', va='center', fontsize=6, color='white' if cm[i, j] > threshold else 'black')
+ax.set_xticks(range(K))
+ax.set_yticks(range(K))
+ax.set_xticklabels(classes.tolist(), fontsize=6)
+ax.set_yticklabels(classes.tolist(), fontsize=6)
+ax.set_title("Confusion Matrix")
+ax.set_xlabel("Predicted")
+ax.set_ylabel("True")
+fig.tight_layout()
+fig.savefig(resdir/"confusion_matrix.png")
+plt.close(fig)
+print("Saved confusion_matrix.png")
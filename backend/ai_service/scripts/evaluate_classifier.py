@@ -14,7 +14,7 @@ Expected dataset format (JSONL):
 import json
 import argparse
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Tuple
 
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
@@ -23,6 +23,8 @@ import numpy as np
 
 from label_mapping import normalize_dataset_label
 
+from _jsonl import loads
+
 
 BASE_AI = Path(__file__).resolve().parents[1]
 MODELS_DIR = BASE_AI / "models"
@@ -33,20 +35,22 @@ CLAUSE_MODEL_DIR = MODELS_DIR / "legalbert_clause_classifier"
 LABEL_MAP_PATH = CLAUSE_MODEL_DIR / "label_classes.json"
 
 
-def load_dataset(path: Path) -> List[Dict]:
-    items = []
-    with open(path, "r", encoding="utf-8") as f:
+def load_dataset(path: Path) -> Tuple[List[str], List[str]]:
+    """Parallel (texts, raw labels) lists for every line with both fields."""
+    texts, labels = [], []
+    with open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                obj = json.loads(line)
+                obj = loads(line)
                 if "text" in obj and "label" in obj:
-                    items.append(obj)
+                    texts.append(obj["text"])
+                    labels.append(obj["label"])
             except json.JSONDecodeError:
                 continue
-    return items
+    return texts, labels
 
 
 def main():
@@ -55,6 +59,9 @@ def main():
                         help="Path to JSONL dataset with 'text' and 'label'")
     parser.add_argument("--out", type=str, default=str(RESULTS_DIR / "classifier_metrics.json"),
                         help="Output JSON file path")
+    parser.add_argument("--batch-size", type=int, default=32, help="Clauses per forward pass")
+    parser.add_argument("--compile", action="store_true",
+                        help="torch.compile the classifier (CUDA only; pays off on large test sets)")
     args = parser.parse_args()
 
     data_path = Path(args.data)
@@ -62,18 +69,23 @@ def main():
         print(f"Dataset not found at {data_path}")
         return
 
-    dataset = load_dataset(data_path)
-    if not dataset:
+    texts, raw_labels = load_dataset(data_path)
+    if not texts:
         print("No valid samples found in dataset.")
         return
 
-    print(f"📊 Loaded {len(dataset)} samples from {data_path.name}")
+    print(f"📊 Loaded {len(texts)} samples from {data_path.name}")
 
     tokenizer = AutoTokenizer.from_pretrained(CLAUSE_MODEL_DIR)
     model = AutoModelForSequenceClassification.from_pretrained(CLAUSE_MODEL_DIR)
     device = "cuda" if torch.cuda.is_available() else "cpu"
     model.to(device)
     model.eval()
+    if device == "cuda":
+        model.half()
+        if args.compile:
+            # dynamic=True: padded batches vary in sequence length, avoid a recompile per shape
+            model = torch.compile(model, dynamic=True)
 
     id2label = model.config.id2label
     label2id = {v: k for k, v in id2label.items()}
@@ -86,41 +98,38 @@ def main():
     else:
         label_classes = {}
 
-    true = []
-    pred = []
-    logits = []  # Ensure logits are collected during evaluation
-    labels = []  # Ensure labels are collected during evaluation
-
-    for i, item in enumerate(dataset):
-        if (i + 1) % 100 == 0:
-            print(f"  Processing {i + 1}/{len(dataset)}...")
-        
-        text = item["text"]
-        y_true_raw = item["label"]
-        
-        # Normalize dataset label to model label format
-        y_true = normalize_dataset_label(y_true_raw)
-        
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=256)
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            logits_batch = model(**inputs).logits
-            probs = torch.nn.functional.softmax(logits_batch, dim=-1)
-            y_pred_id = int(torch.argmax(probs, dim=-1).item())
-        
-        # Map predicted id to human-readable label if available
-        y_pred = label_classes.get(str(y_pred_id), id2label.get(y_pred_id, str(y_pred_id)))
-
-        true.append(y_true)
-        pred.append(y_pred)
-
-        # Collect logits and labels for calibration
-        logits.append(logits_batch.cpu().numpy())
-        labels.append(y_true)
+    # Normalize dataset labels to model label format
+    # (once per distinct label rather than per sample, which also warns once per unmapped label)
+    normalized = {lbl: normalize_dataset_label(lbl) for lbl in set(raw_labels)}
+    true = [normalized[lbl] for lbl in raw_labels]
+    # Pre-sized contiguous (N, C) float32 logits for calibration; each batch writes its rows in place
+    logits = np.empty((len(texts), model.config.num_labels), dtype=np.float32)
+    labels = true  # Ensure labels are collected during evaluation
+
+    # Tokenize once, then batch clauses of similar length so each batch pads only to its own max
+    encoded = tokenizer(texts, truncation=True, max_length=256)
+    order = np.argsort([len(ids) for ids in encoded["input_ids"]], kind="stable")
+
+    batch_size = args.batch_size
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            inputs = tokenizer.pad({k: [encoded[k][i] for i in idx] for k in encoded.keys()}, padding="longest", return_tensors="pt")
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+
+            # One device->host copy per batch, scattered back to the original row order
+            logits[idx] = model(**inputs).logits.float().cpu().numpy()
+
+            done = min(start + batch_size, len(texts))
+            if done % 320 == 0 or done == len(texts):
+                print(f"  Processing {done}/{len(texts)}...")
+
+    # Map predicted id to human-readable label if available
+    pred = [label_classes.get(str(i), id2label.get(i, str(i))) for i in logits.argmax(axis=-1).tolist()]
 
     # After evaluation loop, save logits and labels
-    np.save("../results/logits.npy", logits)
+    # fp16 on disk halves logits.npy I/O; readers upcast (calibration works in float64)
+    np.save("../results/logits.npy", logits.astype(np.float16))
     np.save("../results/labels.npy", labels)
     print("Saved logits and labels for calibration.")
 
@@ -135,7 +144,7 @@ def main():
         "f1_macro": float(f1),
         "f1_weighted": float(f1_score(true, pred, average="weighted", zero_division=0)),
         "classification_report": report,
-        "count": len(dataset),
+        "count": len(texts),
         "model": "legalbert_clause_classifier",
         "device": device,
         "test_file": str(data_path)
@@ -12,15 +12,18 @@ Expected dataset format (JSONL):
 """
 
 import json
+import os
 import argparse
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Set, Tuple
 
 import numpy as np
 import torch
 import faiss
 from transformers import AutoTokenizer, AutoModel
 
+from _jsonl import loads
+
 
 BASE_AI = Path(__file__).resolve().parents[1]
 MODELS_DIR = BASE_AI / "models"
@@ -34,27 +37,40 @@ FAISS_METADATA_PATH = INDEX_DIR / "judgment_metadata.npy"
 JUDGMENT_MODEL_DIR = MODELS_DIR / "legalbert_judgment_finetuned"
 
 
-def load_dataset(path: Path) -> List[Dict]:
-    items = []
-    with open(path, "r", encoding="utf-8") as f:
+def load_dataset(path: Path) -> Tuple[List[str], List[Set[int]]]:
+    """Parallel (queries, relevant id sets) lists."""
+    queries, relevant = [], []
+    with open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                obj = json.loads(line)
+                obj = loads(line)
                 if "query" in obj and "relevant_ids" in obj:
-                    items.append(obj)
+                    queries.append(obj["query"])
+                    relevant.append({int(x) for x in obj["relevant_ids"]})
             except json.JSONDecodeError:
                 continue
-    return items
+    return queries, relevant
+
+
+EMBED_BATCH_SIZE = 64
 
 
-def embed_text(model, tokenizer, text: str):
-    with torch.no_grad():
-        tokens = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-        outputs = model(**tokens)
-        return outputs.last_hidden_state.mean(dim=1).squeeze(0)
+def embed_texts(model, tokenizer, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """Mean-pooled embeddings for `texts` as one contiguous (N, d) float32 matrix."""
+    chunks = []
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            tokens = tokenizer(texts[start:start + batch_size], return_tensors="pt", padding=True, truncation=True, max_length=512)
+            tokens = {k: v.to(model.device) for k, v in tokens.items()}
+            # Forward runs in the model's dtype (fp16 on GPU); pool in fp32 for the float32 index
+            hidden = model(**tokens).last_hidden_state.float()
+            # Average over real tokens only; padding positions would otherwise dilute short queries
+            mask = tokens["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            chunks.append(((hidden * mask).sum(dim=1) / mask.sum(dim=1)).cpu().numpy())
+    return np.ascontiguousarray(np.concatenate(chunks, axis=0), dtype="float32")
 
 
 def main():
@@ -62,6 +78,7 @@ def main():
     parser.add_argument("--data", type=str, default=str(Path(__file__).resolve().parents[3] / "datasets" / "judgments" / "queries.jsonl"),
                         help="Path to JSONL dataset with 'query' and 'relevant_ids' (list)")
     parser.add_argument("--k", type=int, default=5, help="Top-K for recall computation")
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF lists probed per query (ignored by flat indexes)")
     args = parser.parse_args()
 
     data_path = Path(args.data)
@@ -69,8 +86,8 @@ def main():
         print(f"Dataset not found at {data_path}")
         return
 
-    items = load_dataset(data_path)
-    if not items:
+    queries, relevant_ids = load_dataset(data_path)
+    if not queries:
         print("No valid samples found in dataset.")
         return
 
@@ -79,28 +96,45 @@ def main():
         print("FAISS index or metadata not found.")
         return
     index = faiss.read_index(str(FAISS_INDEX_PATH))
+    # IVF/IVF-PQ indexes (see build_faiss_ivfpq.py) only scan `nprobe` coarse lists per query
+    if hasattr(index, "nprobe"):
+        index.nprobe = args.nprobe
+    # Inner-product indexes hold L2-normalized vectors, so queries must be normalized too
+    is_ip = index.metric_type == faiss.METRIC_INNER_PRODUCT
+    # faiss-gpu builds: batched search over HBM is much faster; CPU-only builds lack get_num_gpus
+    if hasattr(faiss, "get_num_gpus") and faiss.get_num_gpus() > 0:
+        index = faiss.index_cpu_to_all_gpus(index)
+        print(f"🚀 FAISS index moved to {faiss.get_num_gpus()} GPU(s)")
     metadata = np.load(FAISS_METADATA_PATH, allow_pickle=True)
 
     # Load embedding model
     tokenizer = AutoTokenizer.from_pretrained(JUDGMENT_MODEL_DIR)
     model = AutoModel.from_pretrained(JUDGMENT_MODEL_DIR)
-    model.eval()
-
-    correct = 0
-    total = len(items)
-
-    for ex in items:
-        q = ex["query"]
-        relevant = set(int(x) for x in ex.get("relevant_ids", []))
-        q_emb = embed_text(model, tokenizer, q).detach().cpu().numpy().astype("float32").reshape(1, -1)
-        distances, indices = index.search(q_emb, args.k)
-        retrieved_ids = []
-        for i in indices[0]:
-            if i < len(metadata):
-                jid, _ = metadata[i]
-                retrieved_ids.append(int(jid))
-        if any(r in relevant for r in retrieved_ids):
-            correct += 1
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model.to(device).eval()
+    if device == "cuda": model.half()
+
+    # Embed all queries in batches and search them in one call; FAISS parallelizes over queries
+    faiss.omp_set_num_threads(os.cpu_count() or 1)
+    Q = embed_texts(model, tokenizer, queries)
+    if is_ip:
+        faiss.normalize_L2(Q)
+    distances, indices = index.search(Q, args.k)
+
+    total = len(queries)
+
+    # Judgment ids of the retrieved rows as an (N, k) matrix; FAISS pads missing results with -1
+    NO_HIT, NO_REL = np.iinfo(np.int64).min, np.iinfo(np.int64).min + 1
+    valid = (indices >= 0) & (indices < len(metadata))
+    retrieved = np.full(indices.shape, NO_HIT, dtype=np.int64)
+    retrieved[valid] = [int(metadata[i][0]) for i in indices[valid]]
+
+    # Relevant ids padded to (N, Rmax); a query is a hit if any retrieved id equals any relevant id
+    relevant = np.full((total, max(map(len, relevant_ids))), NO_REL, dtype=np.int64)
+    for row, ids in enumerate(relevant_ids):
+        relevant[row, :len(ids)] = list(ids)
+    hits = (retrieved[:, :, None] == relevant[:, None, :]).any(axis=(1, 2))
+    correct = int(hits.sum())
 
     recall = correct / total if total else 0.0
     out = {"recall@k": recall, "k": args.k, "count": total}
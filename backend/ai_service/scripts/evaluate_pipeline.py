@@ -14,6 +14,8 @@ DATA_PATH = os.path.join(MODELS_DIR, "prepared_data.csv")
 BERT_PATH = os.path.join(MODELS_DIR, "legalbert_clause_classifier")
 T5_PATH = os.path.join(MODELS_DIR, "legal_t5_summarizer")
 
+BATCH_SIZE = 32
+
 # --- 1. EVALUATE CLASSIFIER (BERT) ---
 def evaluate_classifier():
     print("\n📊 --- EVALUATING LEGALBERT CLASSIFIER ---")
@@ -22,22 +24,23 @@ def evaluate_classifier():
         return
 
     try:
-        # Load FULL dataset first to establish correct label mapping
-        full_df = pd.read_csv(DATA_PATH)
-        # Verify column exists
+        # Only the two columns we use; category dtype stores each label string once
         label_col = 'clause_type' 
-        if label_col not in full_df.columns:
-            print(f"❌ Column '{label_col}' not found in CSV.")
-            return
-
-        # Take a sample for testing (or use full_df for complete accuracy)
-        # Using 200 samples for better statistical significance
-        test_df = full_df.sample(n=200, random_state=42) 
-        print(f"Loaded {len(test_df)} test samples (from {len(full_df)} total records).")
+        full_df = pd.read_csv(DATA_PATH, usecols=['clause_text', label_col],
+                              dtype={'clause_text': 'string', label_col: 'category'})
+    except ValueError as e:
+        # read_csv raises ValueError when a usecols column is missing
+        print(f"❌ Column '{label_col}' or 'clause_text' not found in CSV: {e}")
+        return
     except Exception as e:
         print(f"❌ Error loading data: {e}")
         return
 
+    # Take a sample for testing (or use full_df for complete accuracy)
+    # Using 200 samples for better statistical significance; smaller CSVs are used whole
+    test_df = full_df.sample(n=min(200, len(full_df)), random_state=42)
+    print(f"Loaded {len(test_df)} test samples (from {len(full_df)} total records).")
+
     try:
         tokenizer = AutoTokenizer.from_pretrained(BERT_PATH)
         model = AutoModelForSequenceClassification.from_pretrained(BERT_PATH)
@@ -52,23 +55,28 @@ def evaluate_classifier():
     y_pred = []
     print("Running predictions...")
     
-    # --- CRITICAL FIX: BUILD LABEL MAP FROM FULL DATASET ---
-    # We must sort the UNIQUE labels from the FULL dataset, not just the sample.
-    # This ensures ID 0 is always the same class (e.g., "Arbitration") regardless of sample.
-    unique_labels = sorted(full_df[label_col].dropna().unique().tolist())
-    id2label = {i: label for i, label in enumerate(unique_labels)}
-    
-    print(f"ℹ️ Reconstructed Label Map with {len(id2label)} classes (from full data).")
+    # Prefer the label names saved with the model; checkpoints exported with generic
+    # LABEL_i names fall back to the sorted labels of the FULL dataset (the training order),
+    # read off the category dtype without another pass over the data.
+    id2label = {int(i): name for i, name in model.config.id2label.items()}
+    if all(name == f"LABEL_{i}" for i, name in id2label.items()):
+        unique_labels = sorted(full_df[label_col].cat.categories.tolist())
+        id2label = {i: label for i, label in enumerate(unique_labels)}
+        print(f"ℹ️ Reconstructed Label Map with {len(id2label)} classes (from full data).")
+    else:
+        print(f"ℹ️ Using the model's Label Map with {len(id2label)} classes.")
+    del full_df
     
-    for text in test_df['clause_text']:
-        inputs = tokenizer(str(text), return_tensors="pt", truncation=True, max_length=512)
-        with torch.no_grad():
-            logits = model(**inputs).logits
-        pred_id = torch.argmax(logits, dim=1).item()
-        
-        # Map ID back to Label using our robust map
-        pred_label = id2label.get(pred_id, "Unknown")
-        y_pred.append(pred_label)
+    # One padded tokenize + forward per batch instead of one per clause
+    texts = test_df['clause_text'].astype(str).tolist()
+    model.eval()
+    with torch.inference_mode():
+        for i in range(0, len(texts), BATCH_SIZE):
+            inputs = tokenizer(texts[i:i + BATCH_SIZE], return_tensors="pt", truncation=True, padding=True, max_length=512)
+            pred_ids = model(**inputs).logits.argmax(dim=1).tolist()
+            
+            # Map ID back to Label using our robust map
+            y_pred.extend(id2label.get(pred_id, "Unknown") for pred_id in pred_ids)
 
     # Metrics
     accuracy = accuracy_score(y_true, y_pred)
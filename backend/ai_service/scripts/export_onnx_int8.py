@@ -0,0 +1,83 @@
+"""
+Export LegalBERT Models to int8 ONNX
+------------------------------------
+Exports the clause classifier (logits) and the judgment encoder
+(last_hidden_state) to ONNX and applies dynamic int8 weight quantization with
+ONNX Runtime. app.py picks the *.int8.onnx files up automatically when
+onnxruntime is installed and serves them with CPUExecutionProvider.
+
+Outputs (next to each model directory):
+    models/legalbert_clause_classifier/model.int8.onnx
+    models/legalbert_judgment_finetuned/model.int8.onnx
+
+Usage:
+    python backend/ai_service/scripts/export_onnx_int8.py [--skip-judge]
+"""
+
+import argparse
+from pathlib import Path
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+
+
+BASE_AI = Path(__file__).resolve().parents[1]
+MODELS_DIR = BASE_AI / "models"
+BERT_DIR = MODELS_DIR / "legalbert_clause_classifier"
+JUDGE_DIR = MODELS_DIR / "legalbert_judgment_finetuned"
+
+ONNX_FP32_NAME = "model.onnx"
+ONNX_INT8_NAME = "model.int8.onnx"
+
+
+class _OutputOnly(torch.nn.Module):
+    """Wraps an HF model so the ONNX graph has a single named tensor output."""
+
+    def __init__(self, model, field: str):
+        super().__init__()
+        self.model = model
+        self.field = field
+
+    def forward(self, input_ids, attention_mask):
+        return getattr(self.model(input_ids=input_ids, attention_mask=attention_mask), self.field)
+
+
+def export(model_dir: Path, model, field: str, output_name: str) -> Path:
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+    sample = tokenizer(["Sample clause for export."], return_tensors="pt", padding=True, truncation=True, max_length=512)
+    fp32_path = model_dir / ONNX_FP32_NAME
+    int8_path = model_dir / ONNX_INT8_NAME
+
+    model.eval()
+    dynamic = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        _OutputOnly(model, field),
+        (sample["input_ids"], sample["attention_mask"]),
+        str(fp32_path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=[output_name],
+        dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, output_name: {0: "batch"} if field == "logits" else dynamic},
+        opset_version=17,
+    )
+    print(f"✅ Exported {model_dir.name} -> {fp32_path}")
+
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    fp32_mb = fp32_path.stat().st_size / 1e6
+    int8_mb = int8_path.stat().st_size / 1e6
+    print(f"✅ Quantized -> {int8_path} ({fp32_mb:.0f} MB -> {int8_mb:.0f} MB)")
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-judge", action="store_true", help="Only export the clause classifier")
+    args = parser.parse_args()
+
+    export(BERT_DIR, AutoModelForSequenceClassification.from_pretrained(BERT_DIR), "logits", "logits")
+    if not args.skip_judge:
+        export(JUDGE_DIR, AutoModel.from_pretrained(JUDGE_DIR), "last_hidden_state", "last_hidden_state")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ import numpy as np
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import confusion_matrix, f1_score, precision_score, recall_score, classification_report
+from sklearn.metrics import confusion_matrix, f1_score, precision_recall_fscore_support, classification_report
 
 RESULTS_DIR = Path(__file__).resolve().parents[1] / "results"
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
@@ -46,26 +46,18 @@ def generate_confusion_matrix(y_true, y_pred, labels_list, output_path):
 
 def compute_per_class_metrics(y_true, y_pred, labels_list):
     """Compute per-class metrics"""
+    # All classes in one pass instead of a binary-mask f1/precision/recall per class
+    precision, recall, f1, support = precision_recall_fscore_support(
+        y_true, y_pred, labels=list(range(len(labels_list))), average=None, zero_division=0
+    )
+
     per_class_metrics = {}
-    
-    # Compute metrics for each class
     for idx, label in enumerate(labels_list):
-        # Binary classification: this class vs others
-        y_true_binary = (y_true == idx).astype(int)
-        y_pred_binary = (y_pred == idx).astype(int)
-        
-        f1 = f1_score(y_true_binary, y_pred_binary, zero_division=0)
-        precision = precision_score(y_true_binary, y_pred_binary, zero_division=0)
-        recall = recall_score(y_true_binary, y_pred_binary, zero_division=0)
-        
-        # Support (count of true instances)
-        support = np.sum(y_true == idx)
-        
         per_class_metrics[label] = {
-            "f1": float(f1),
-            "precision": float(precision),
-            "recall": float(recall),
-            "support": int(support)
+            "f1": float(f1[idx]),
+            "precision": float(precision[idx]),
+            "recall": float(recall[idx]),
+            "support": int(support[idx])
         }
     
     return per_class_metrics
@@ -78,28 +70,22 @@ def main():
                         help="Path to label_classes.json mapping")
     args = parser.parse_args()
     
-    # Load logits and labels
-    logits_list = np.load(args.logits, allow_pickle=True)
+    # Load logits and labels; logits are a contiguous (N, C) float array, so memory-map them
+    logits_array = np.load(args.logits, mmap_mode="r")
     labels_array = np.load(args.labels, allow_pickle=True)
-    
-    # Reshape logits if needed
-    if isinstance(logits_list, np.ndarray) and logits_list.dtype == object:
-        logits_array = np.vstack(logits_list)
-    else:
-        logits_array = logits_list
-        if logits_array.ndim > 2:
-            logits_array = logits_array.reshape(logits_array.shape[0], -1)
+    if logits_array.ndim > 2:
+        logits_array = logits_array.reshape(logits_array.shape[0], -1)
     
     # Get predictions from logits
-    predictions_indices = np.argmax(logits_array, axis=1).flatten()
+    predictions_indices = logits_array.argmax(axis=1)
     
     # Map string labels to indices
-    unique_labels = sorted(set(labels_array))
-    label_to_index = {label: idx for idx, label in enumerate(unique_labels)}
-    labels_indices = np.array([label_to_index[label] for label in labels_array])
+    # np.unique sorts once and returns each sample's class index in the same pass
+    unique_labels, labels_indices = np.unique(labels_array, return_inverse=True)
+    unique_labels = unique_labels.tolist()  # plain Python labels for json keys and formatting
     
     # Ensure predictions are valid indices
-    predictions_indices = np.array([int(p) if p < len(unique_labels) else 0 for p in predictions_indices])
+    predictions_indices = np.where(predictions_indices < len(unique_labels), predictions_indices, 0)
     
     print(f"Unique labels: {unique_labels}")
     print(f"Number of samples: {len(labels_indices)}")
@@ -2,6 +2,8 @@
 import json, numpy as np, sys
 from pathlib import Path
 
+from _jsonl import loads
+
 SCRIPT_DIR = Path(__file__).resolve().parent   # .../backend/ai_service/scripts
 # repo root should be 3 levels up from scripts: scripts -> ai_service -> backend -> repo_root
 # but to be defensive, try several fallbacks
@@ -65,8 +67,11 @@ if not logits_file.exists() or not labels_file.exists():
     else:
         raise FileNotFoundError("Could not find logits.npy and/or labels.npy in expected locations.")
 
-logits = np.load(str(logits_file))
-labels = np.load(str(labels_file)).astype(int)
+# Only the labels are read; logits.npy is located alongside them but never loaded.
+# Memory-map the labels and copy only if they were not saved as integers.
+labels = np.load(str(labels_file), mmap_mode="r")
+if not np.issubdtype(labels.dtype, np.integer):
+    labels = labels.astype(int)
 
 # Load test dataset
 if not DATA_PATH.exists():
@@ -77,15 +82,12 @@ if not DATA_PATH.exists():
     DATA_PATH = found[0]
     print("Found test.jsonl at:", DATA_PATH)
 
-lines = [json.loads(l) for l in open(DATA_PATH, encoding="utf8")]
+lines = [l for l in DATA_PATH.read_bytes().splitlines() if l.strip()]
 
-# Collect candidates
-candidates = []
-for i, sample in enumerate(lines):
-    if int(labels[i]) in bad_classes:
-        candidates.append(sample)
-    if len(candidates) >= 500:
-        break
+# Collect candidates: one C-level membership scan over the labels, first 500 hits,
+# and only those lines are parsed
+idxs = np.flatnonzero(np.isin(labels[:len(lines)], np.asarray(bad_classes, dtype=int)))[:500]
+candidates = [loads(lines[i]) for i in idxs]
 
 # Save
 OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -1,7 +1,8 @@
 # generate_relabel_candidates_by_class.py
 import json, numpy as np, argparse
 from pathlib import Path
-from collections import defaultdict
+
+from _jsonl import loads, dumps_line
 
 ROOT = Path("backend/ai_service")
 RESULTS_DIR = ROOT / "results"
@@ -22,25 +23,27 @@ args = parser.parse_args()
 print("Target classes:", args.classes)
 print("Reading test:", DATA_PATH)
 
-lines = [json.loads(l) for l in open(DATA_PATH, encoding="utf8")]
-labels = np.load(RESULTS_DIR / "labels.npy")
+lines = open(DATA_PATH, "rb").readlines()
+labels = np.load(RESULTS_DIR / "labels.npy")[:len(lines)].astype(np.int64)
 
-# collect by label
-by_label = defaultdict(list)
-for i, obj in enumerate(lines):
-    lab = int(labels[i])
-    by_label[lab].append((i, obj))
+# group by label in C: a stable sort keeps file order within each class, searchsorted finds its range
+order = np.argsort(labels, kind="stable")
+sorted_labels = labels[order]
 
 for cls in args.classes:
-    arr = by_label.get(cls, [])
-    if not arr:
+    lo, hi = np.searchsorted(sorted_labels, [cls, cls + 1])
+    if lo == hi:
         print(f"No examples found for class {cls}")
         continue
-    take = arr[:args.per_class]
+    take = order[lo:min(hi, lo + args.per_class)]
     out_path = OUT_DIR / f"{args.out_prefix}_class_{cls}.jsonl"
-    with open(out_path, "w", encoding="utf8") as f:
-        for idx, obj in take:
-            # include original index for traceability
-            obj["_orig_index"] = idx
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    buf = bytearray()
+    for idx in take.tolist():
+        # only the selected lines are parsed
+        obj = loads(lines[idx])
+        # include original index for traceability
+        obj["_orig_index"] = idx
+        buf += dumps_line(obj)
+    # one write per class file instead of one per record
+    out_path.write_bytes(buf)
     print("Wrote", len(take), "candidates to", out_path)
@@ -14,6 +14,8 @@ from pathlib import Path
 from tqdm import tqdm
 from sklearn.model_selection import train_test_split
 
+from _jsonl import loads, dumps_line
+
 # -------------------------------
 # PATHS
 # -------------------------------
@@ -25,9 +27,11 @@ VAL_OUT   = DATA_DIR / "summarize_validation.jsonl"
 # -------------------------------
 # HELPER: simple cleaner
 # -------------------------------
+_WS = re.compile(r"\s+")
+
 def clean_text(t):
     if not t: return ""
-    t = re.sub(r"\s+", " ", t)
+    t = _WS.sub(" ", t)
     t = t.strip()
     return t
 
@@ -35,20 +39,31 @@ def clean_text(t):
 # HELPER: balanced summary generator
 # (formal + simple style)
 # -------------------------------
+# Compiled once; the plain word swaps share one alternation so each clause is scanned once for them.
+# shall/upon keep their word boundaries, the other phrases match anywhere as before.
+_PARTY_SHALL = re.compile(r"^The\s+party\s+shall", re.I)
+_WORD_SWAPS = {
+    "shall": "must",
+    "upon": "after",
+    "hereby": "",
+    "agreement": "contract",
+    "confidential information": "private information",
+}
+_WORDS = re.compile(r"\b(?:shall|upon)\b|hereby|agreement|confidential information", re.I)
+_WITHIN_DAYS = re.compile(r"within\s+(\d+)\s+days", re.I)
+_LEADING_NUM = re.compile(r"^\d+\.\s*")
+
 def make_summary(text):
     """
     Simple rule-based pseudo-summarizer to produce training pairs.
     You can later replace this logic with GPT-generated summaries.
     """
     t = clean_text(text)
-    t = re.sub(r"^The\s+party\s+shall", "The party agrees to", t, flags=re.I)
-    t = re.sub(r"\bshall\b", "must", t, flags=re.I)
-    t = re.sub(r"\bupon\b", "after", t, flags=re.I)
-    t = re.sub(r"hereby", "", t, flags=re.I)
-    t = re.sub(r"agreement", "contract", t, flags=re.I)
-    t = re.sub(r"confidential information", "private information", t, flags=re.I)
-    t = re.sub(r"within\s+(\d+)\s+days", r"in \1 days", t, flags=re.I)
-    t = re.sub(r"^\d+\.\s*", "", t)
+    t = _PARTY_SHALL.sub("The party agrees to", t)
+    # Unicode case-folding lets re.I match forms such as "ſhall" whose lower() is not a key: leave those as-is
+    t = _WORDS.sub(lambda m: _WORD_SWAPS.get(m.group(0).lower(), m.group(0)), t)
+    t = _WITHIN_DAYS.sub(r"in \1 days", t)
+    t = _LEADING_NUM.sub("", t)
     # remove redundancy
     if len(t.split()) > 22:
         t = " ".join(t.split()[:22]) + "..."
@@ -62,10 +77,10 @@ if not SRC_FILE.exists():
     raise SystemExit(f"❌ train.jsonl not found at {SRC_FILE}")
 
 records = []
-with open(SRC_FILE, "r", encoding="utf-8") as f:
+with open(SRC_FILE, "rb") as f:
     for line in f:
         try:
-            item = json.loads(line)
+            item = loads(line)
             if not item.get("text"): continue
             item["summary"] = make_summary(item["text"])
             records.append(item)
@@ -83,10 +98,8 @@ train_records, val_records = train_test_split(records, test_size=0.2, random_sta
 # WRITE OUTPUTS
 # -------------------------------
 for out_path, recs in [(TRAIN_OUT, train_records), (VAL_OUT, val_records)]:
-    with open(out_path, "w", encoding="utf-8") as f:
-        for r in recs:
-            json.dump(r, f, ensure_ascii=False)
-            f.write("\n")
+    # Encode everything, then one write per file instead of two writes per record
+    out_path.write_bytes(b"".join(dumps_line(r) for r in recs))
     print(f"💾 Wrote {len(recs)} records → {out_path}")
 
 print("\n🎉 Dataset generation complete.")
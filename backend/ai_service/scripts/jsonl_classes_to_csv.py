@@ -1,17 +1,24 @@
 # jsonl_classes_to_csv.py
-import json, csv
+import csv
 from pathlib import Path
 
+from _jsonl import loads
+
 IN_DIR = Path("backend/ai_service/datasets/relabel_by_class")
 OUT_DIR = IN_DIR
+
+def rows(fi):
+    for i, line in enumerate(fi):
+        obj = loads(line)
+        text = obj.get("text") or obj.get("clause_text") or obj.get("clause") or ""
+        orig = obj.get("label", obj.get("labels",""))
+        yield (i, obj.get("_orig_index", ""), text.replace("\n"," "), orig, "", "")
+
 for p in sorted(IN_DIR.glob("*.jsonl")):
     out = p.with_suffix(".csv")
-    with open(p, encoding="utf8") as fi, open(out, "w", newline='', encoding="utf8") as fo:
+    with open(p, "rb") as fi, open(out, "w", newline='', encoding="utf8") as fo:
         writer = csv.writer(fo)
         writer.writerow(["example_id","orig_index","text","original_label","new_label","note"])
-        for i, line in enumerate(fi):
-            obj = json.loads(line)
-            text = obj.get("text") or obj.get("clause_text") or obj.get("clause") or ""
-            orig = obj.get("label", obj.get("labels",""))
-            writer.writerow([i, obj.get("_orig_index", ""), text.replace("\n"," "), orig, "", ""])
+        # one writerows call streams the generator; no per-row writerow dispatch
+        writer.writerows(rows(fi))
     print("Wrote", out)
@@ -5,6 +5,7 @@ Model uses readable label format like 'Payment Terms'.
 """
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
 # Mapping from dataset labels to model-friendly labels
@@ -36,8 +37,12 @@ DATASET_TO_MODEL = {
     "warranties": "Warranties and Representations"
 }
 
+# Underscore-free keys for the fuzzy fallback, built once instead of scanned per call
+_STRIPPED_MAP = {k.replace("_", ""): v for k, v in DATASET_TO_MODEL.items()}
+
+@lru_cache(maxsize=512)
 def normalize_dataset_label(label: str) -> str:
-    """Convert dataset label format to model label format."""
+    """Convert dataset label format to model label format (memoized; labels repeat across a dataset)."""
     if isinstance(label, str):
         # Remove extra spaces and convert to lowercase
         label = label.strip().lower().replace(" ", "_")
@@ -47,9 +52,9 @@ def normalize_dataset_label(label: str) -> str:
         return DATASET_TO_MODEL[label]
     
     # Try fuzzy matching
-    for dataset_lbl, model_lbl in DATASET_TO_MODEL.items():
-        if dataset_lbl.replace("_", "") == label.replace("_", ""):
-            return model_lbl
+    key = label.replace("_", "")
+    if key in _STRIPPED_MAP:
+        return _STRIPPED_MAP[key]
     
     print(f"⚠️ Warning: Could not map label '{label}' — using as-is")
     return label
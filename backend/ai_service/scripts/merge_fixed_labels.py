@@ -13,6 +13,8 @@ import csv, json
 from pathlib import Path
 from collections import defaultdict
 
+from _jsonl import loads, dumps_line, read_jsonl
+
 ROOT = Path("backend/ai_service")
 CAND_IN = ROOT / "datasets" / "relabel_candidates.jsonl"
 CSV_IN = ROOT / "datasets" / "relabel_fixed.csv"   # upload this (or relabeled CSV)
@@ -25,7 +27,7 @@ if not CSV_IN.exists():
     raise FileNotFoundError(f"Relabeled CSV not found: {CSV_IN}. Make sure you exported relabel_fixed.csv")
 
 # Build list of candidate objects (order matches relabel_candidates.jsonl)
-candidates = [json.loads(line) for line in open(CAND_IN, encoding="utf8")]
+candidates = read_jsonl(CAND_IN)
 
 # Load csv mapping of example_id -> new_label
 mapping = {}
@@ -67,8 +69,9 @@ replaced = 0
 unmatched = []
 
 out_lines = []
-for i, line in enumerate(open(TEST_IN, encoding="utf8")):
-    obj = json.loads(line)
+# One read + bytes.splitlines (a C memchr scan) instead of per-line readline calls
+for i, line in enumerate(TEST_IN.read_bytes().splitlines()):
+    obj = loads(line)
     total += 1
     text = (obj.get("text") or obj.get("clause_text") or obj.get("clause") or "").strip()
     label = obj.get("label", obj.get("labels", obj.get("original_label", None)))
@@ -97,9 +100,8 @@ for i, line in enumerate(open(TEST_IN, encoding="utf8")):
     out_lines.append(obj)
 
 # Write out
-with open(TEST_OUT, "w", encoding="utf8") as f:
-    for o in out_lines:
-        f.write(json.dumps(o, ensure_ascii=False) + "\n")
+# Encode everything, then one write instead of one per record
+TEST_OUT.write_bytes(b"".join(dumps_line(o) for o in out_lines))
 
 # Report
 report = {
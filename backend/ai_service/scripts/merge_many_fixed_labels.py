@@ -3,6 +3,8 @@ import csv
 import glob
 from pathlib import Path
 
+from _jsonl import dumps_line, read_jsonl
+
 BASE = Path("backend/ai_service/datasets")
 TEST_IN = BASE / "test.jsonl"
 TEST_OUT = BASE / "test_fixed.jsonl"
@@ -10,7 +12,7 @@ REPORT = BASE / "merge_many_report.json"
 RELABEL_DIR = BASE / "relabel_by_class"
 
 # Load test
-data = [json.loads(l) for l in open(TEST_IN, "r", encoding="utf-8")]
+data = read_jsonl(TEST_IN)
 
 # Build map from orig_index -> new_label
 mapping = {}
@@ -36,9 +38,8 @@ for i, row in enumerate(data):
         row["label"] = mapping[idx]
         replaced += 1
 
-with open(TEST_OUT, "w", encoding="utf-8") as out:
-    for row in data:
-        out.write(json.dumps(row) + "\n")
+# Encode everything, then one write instead of one per record
+TEST_OUT.write_bytes(b"".join(dumps_line(row) for row in data))
 
 json.dump({
     "input_test_count": len(data),
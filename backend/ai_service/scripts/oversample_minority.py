@@ -1,26 +1,35 @@
 # oversample_minority.py
-import json, collections, random
+import collections
 from pathlib import Path
 
+import numpy as np
+
+from _jsonl import dumps_line, read_jsonl
+
 src = Path("backend/ai_service/datasets/clause_dataset/prepared/train_relabelled.jsonl")
 if not src.exists():
     src = Path("backend/ai_service/datasets/clause_dataset/prepared/train_int.jsonl")
 out = Path("backend/ai_service/datasets/clause_dataset/prepared/train_balanced.jsonl")
 
-lines = [json.loads(l) for l in src.read_text(encoding="utf-8").splitlines()]
-counts = collections.Counter([str(l["label"]) for l in lines])
+lines = read_jsonl(src)
+labels = np.array([str(l["label"]) for l in lines])
+classes, class_counts = np.unique(labels, return_counts=True)
+counts = collections.Counter(dict(zip(classes.tolist(), class_counts.tolist())))
 max_count = max(counts.values())
 
 print("Class counts before:", counts)
-new = list(lines)
-for label, cnt in counts.items():
+# Work on row indices: every original row once, plus `need` random draws per minority class
+rng = np.random.default_rng(42)
+picks = [np.arange(len(lines))]
+for label, cnt in zip(classes, class_counts):
     need = max_count - cnt
     if need <= 0:
         continue
-    samples = [s for s in lines if str(s["label"]) == label]
-    for i in range(need):
-        new.append(random.choice(samples))
+    idx = np.flatnonzero(labels == label)
+    picks.append(idx[rng.integers(0, len(idx), size=need)])
 
-random.shuffle(new)
-out.write_text("\n".join(json.dumps(x, ensure_ascii=False) for x in new), encoding="utf-8")
-print("Wrote", out, "len:", len(new))
+order = rng.permutation(np.concatenate(picks))
+# Serialize each source row once; duplicates reuse its bytes
+encoded = [dumps_line(x) for x in lines]
+out.write_bytes(b"".join(encoded[i] for i in order))
+print("Wrote", out, "len:", len(order))
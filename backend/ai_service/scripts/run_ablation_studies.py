@@ -25,6 +25,8 @@ import torch
 RESULTS_DIR = Path(__file__).resolve().parents[1] / "results"
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+BATCH_SIZE = 32
+
 def load_test_data(test_file):
     """Load test data from JSONL file"""
     texts = []
@@ -59,6 +61,16 @@ def evaluate_model(predictions, labels, model_name):
         "recall_macro": float(recall_macro)
     }
 
+def predict_ids(texts, tokenizer, model, device, batch_size=BATCH_SIZE):
+    """Argmax class ids for `texts`; argmax stays on device, one host copy per batch (no per-sample .item())"""
+    pred_ids = []
+    with torch.inference_mode():
+        for start in range(0, len(texts), batch_size):
+            inputs = tokenizer(texts[start:start + batch_size], return_tensors="pt", truncation=True, padding=True, max_length=512)
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+            pred_ids.extend(model(**inputs).logits.argmax(dim=1).cpu().tolist())
+    return pred_ids
+
 def evaluate_legalbert(texts, labels, model_path):
     """Evaluate LegalBERT clause classifier"""
     try:
@@ -69,16 +81,8 @@ def evaluate_legalbert(texts, labels, model_path):
         model.to(device)
         model.eval()
         
-        predictions = []
-        with torch.no_grad():
-            for text in texts:
-                inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-                inputs = {k: v.to(device) for k, v in inputs.items()}
-                outputs = model(**inputs)
-                logits = outputs.logits
-                pred_id = torch.argmax(logits, dim=1).item()
-                pred_label = model.config.id2label.get(pred_id, str(pred_id))
-                predictions.append(pred_label)
+        predictions = [model.config.id2label.get(pred_id, str(pred_id))
+                       for pred_id in predict_ids(texts, tokenizer, model, device)]
         
         return evaluate_model(predictions, labels, "LegalBERT")
     except Exception as e:
@@ -95,19 +99,11 @@ def evaluate_bert_base(texts, labels, model_name="bert-base-uncased"):
         model.to(device)
         model.eval()
         
-        predictions = []
         unique_labels = sorted(set(labels))
         idx_to_label = {idx: label for idx, label in enumerate(unique_labels)}
         
-        with torch.no_grad():
-            for text in texts:
-                inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-                inputs = {k: v.to(device) for k, v in inputs.items()}
-                outputs = model(**inputs)
-                logits = outputs.logits
-                pred_id = torch.argmax(logits, dim=1).item()
-                pred_label = idx_to_label.get(pred_id, unique_labels[0])
-                predictions.append(pred_label)
+        predictions = [idx_to_label.get(pred_id, unique_labels[0])
+                       for pred_id in predict_ids(texts, tokenizer, model, device)]
         
         return evaluate_model(predictions, labels, "BERT-base")
     except Exception as e:
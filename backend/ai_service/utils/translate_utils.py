@@ -4,28 +4,41 @@ Translation Utilities using MarianMT (Helsinki-NLP)
 Provides simple helpers for translate-first multilingual processing:
 - translate_to_en(text, src_hint=None): Hindi/Marathi → English
 - translate_to_hi(text): English → Hindi (back-translation)
+- translate_batch_to_en(texts, src_hint=None) / translate_batch_to_hi(texts):
+  batched variants (one generate per `batch_size` texts, greedy top-1)
+- translate_batch(texts, src, tgt): any Helsinki-NLP opus-mt-{src}-{tgt} pair
+  (e.g. en↔fr/de/es pivots for back-translation)
 
 Notes:
-- Models are loaded lazily and cached.
+- Models are loaded lazily once per direction and cached (eval mode, fp16 on GPU).
 - Uses GPU if available, otherwise CPU.
+- Decoding is greedy (num_beams=1): only the top-1 translation is ever used.
 - Marathi back-translation can be added similarly if needed.
 """
 
-from typing import Optional
+from typing import List, Optional
 from functools import lru_cache
 import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+MAX_NEW_TOKENS = 128
+
+
+def _load(name: str):
+    """Load a MarianMT tokenizer/model pair for inference (eval, fp16 on CUDA)."""
+    tok = AutoTokenizer.from_pretrained(name)
+    mdl = AutoModelForSeq2SeqLM.from_pretrained(name).to(DEVICE).eval()
+    if DEVICE == "cuda":
+        mdl = mdl.half()
+    return tok, mdl
 
 
 @lru_cache(maxsize=1)
 def _get_hi_en():
     try:
-        tok = AutoTokenizer.from_pretrained("Helsinki-NLP/opus-mt-hi-en")
-        mdl = AutoModelForSeq2SeqLM.from_pretrained("Helsinki-NLP/opus-mt-hi-en").to(DEVICE)
-        return tok, mdl
+        return _load("Helsinki-NLP/opus-mt-hi-en")
     except Exception as e:
         print("⚠️ Failed to load Helsinki-NLP/opus-mt-hi-en tokenizer/model:", e)
         print("   Hint: install 'sentencepiece' (pip install sentencepiece) to enable MarianMT tokenizers.")
@@ -35,9 +48,7 @@ def _get_hi_en():
 @lru_cache(maxsize=1)
 def _get_mr_en():
     try:
-        tok = AutoTokenizer.from_pretrained("Helsinki-NLP/opus-mt-mr-en")
-        mdl = AutoModelForSeq2SeqLM.from_pretrained("Helsinki-NLP/opus-mt-mr-en").to(DEVICE)
-        return tok, mdl
+        return _load("Helsinki-NLP/opus-mt-mr-en")
     except Exception as e:
         print("⚠️ Failed to load Helsinki-NLP/opus-mt-mr-en tokenizer/model:", e)
         print("   Hint: install 'sentencepiece' (pip install sentencepiece) to enable MarianMT tokenizers.")
@@ -47,16 +58,24 @@ def _get_mr_en():
 @lru_cache(maxsize=1)
 def _get_en_hi():
     try:
-        tok = AutoTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-hi")
-        mdl = AutoModelForSeq2SeqLM.from_pretrained("Helsinki-NLP/opus-mt-en-hi").to(DEVICE)
-        return tok, mdl
+        return _load("Helsinki-NLP/opus-mt-en-hi")
     except Exception as e:
         print("⚠️ Failed to load Helsinki-NLP/opus-mt-en-hi tokenizer/model:", e)
         print("   Hint: install 'sentencepiece' (pip install sentencepiece) to enable MarianMT tokenizers.")
         return None, None
 
 
-def _generate(model, tokenizer, text: str, max_length: int = 256) -> str:
+@lru_cache(maxsize=None)
+def _get_pair(src: str, tgt: str):
+    name = f"Helsinki-NLP/opus-mt-{src}-{tgt}"
+    try:
+        return _load(name)
+    except Exception as e:
+        print(f"⚠️ Failed to load {name} tokenizer/model:", e)
+        return None, None
+
+
+def _generate(model, tokenizer, text: str, max_new_tokens: int = MAX_NEW_TOKENS) -> str:
     # If tokenizer/model failed to load, return original text as a safe fallback
     if tokenizer is None or model is None:
         print("⚠️ Translation model/tokenizer unavailable — returning original text.")
@@ -64,11 +83,57 @@ def _generate(model, tokenizer, text: str, max_length: int = 256) -> str:
 
     inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=256)
     inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
-    with torch.no_grad():
-        ids = model.generate(**inputs, max_length=max_length, num_beams=4)
+    with torch.inference_mode():
+        ids = model.generate(**inputs, max_new_tokens=max_new_tokens, num_beams=1, do_sample=False, use_cache=True)
     return tokenizer.decode(ids[0], skip_special_tokens=True)
 
 
+def _generate_batch(model, tokenizer, texts: List[str], batch_size: int = 32, max_length: int = 256) -> List[str]:
+    """Greedy (num_beams=1) translation of `texts`, `batch_size` sentences per generate call."""
+    if tokenizer is None or model is None:
+        print("⚠️ Translation model/tokenizer unavailable — returning original texts.")
+        return list(texts)
+
+    outputs = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        inputs = tokenizer(batch, return_tensors="pt", truncation=True, padding=True, max_length=256)
+        inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
+        with torch.inference_mode():
+            ids = model.generate(**inputs, max_length=max_length, num_beams=1, do_sample=False, use_cache=True)
+        outputs.extend(tokenizer.batch_decode(ids, skip_special_tokens=True))
+    return outputs
+
+
+def translate_batch(texts: List[str], src: str, tgt: str, batch_size: int = 32, max_length: int = 128) -> List[str]:
+    """Translate a list of texts from `src` to `tgt` using the cached MarianMT models.
+
+    {"hi", "mr"} → "en" and "en" → "hi" reuse the dedicated loaders; any other pair loads
+    Helsinki-NLP/opus-mt-{src}-{tgt}. Output is capped at `max_length` tokens (128 covers
+    clause-length sentences); decode cost grows with it.
+    """
+    if src == "en" and tgt == "hi":
+        tok, mdl = _get_en_hi()
+    elif src == "mr" and tgt == "en":
+        tok, mdl = _get_mr_en()
+    elif src == "hi" and tgt == "en":
+        tok, mdl = _get_hi_en()
+    else:
+        tok, mdl = _get_pair(src, tgt)
+    return _generate_batch(mdl, tok, list(texts), batch_size=batch_size, max_length=max_length)
+
+
+def translate_batch_to_en(texts: List[str], src_hint: Optional[str] = None, batch_size: int = 32, max_length: int = 128) -> List[str]:
+    """Batched translate_to_en (Hindi by default, Marathi with src_hint="mr")."""
+    src = "mr" if (src_hint or "hi").lower() == "mr" else "hi"
+    return translate_batch(texts, src, "en", batch_size=batch_size, max_length=max_length)
+
+
+def translate_batch_to_hi(texts: List[str], batch_size: int = 32, max_length: int = 128) -> List[str]:
+    """Batched translate_to_hi (English → Hindi)."""
+    return translate_batch(texts, "en", "hi", batch_size=batch_size, max_length=max_length)
+
+
 def translate_to_en(text: str, src_hint: Optional[str] = None) -> str:
     """Translate Hindi/Marathi text to English.
 